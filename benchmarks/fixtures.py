@@ -0,0 +1,190 @@
+# Saved store pages used by benchmarks instead of live stores.
+#
+# Pages are generated with the same markup the store extractors in scraping.py read,
+# run "python -m benchmarks.fixtures" from repository root to write them again, or
+# "python -m benchmarks.fixtures --record 'hp i7 32 gb rtx 3070 ti'" to save live store pages
+# (needs network and Chrome).
+
+import argparse
+import os
+import random
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Store name in scraping.py: fixture file name and number of products on the page
+FIXTURES = {
+    "HP store": ("hpstore.html", 48),
+    "Nesiojami": ("nesiojami.html", 48),
+    "Kilobaitas": ("kilobaitas.html", 60),
+    "Skytech": ("skytech.html", 100),
+    "Senukai": ("senukai.html", 60),
+    "1a": ("1a.html", 60),
+    "Varle": ("varle.html", 48),
+    "RDE": ("rde.html", 40),
+    "Pigu": ("pigu.html", 60),
+}
+
+BRANDS = ["HP Victus 16", "HP Omen 17", "Lenovo Legion 5 Pro", "Lenovo Legion 7", "Dell G16", "Asus ROG Strix G17", "Acer Predator Helios 16", "MSI Katana 15"]
+CPUS = ["i7-13700HX", "i7-12700H", "i9-13900HX", "Ryzen 7 7840HS", "i5-13500H"]
+GPUS = ["RTX 3070 Ti", "RTX 4060", "RTX 4070", "RTX 3060", "RTX 4080"]
+RAM = ["16GB", "32 GB", "32GB", "64GB"]
+SSD = ["512GB SSD", "1TB SSD", "2TB SSD"]
+
+
+def make_products(count, seed):
+    """Deterministic list of (description, price, product id)"""
+
+    rng = random.Random(seed)
+    products = []
+    for index in range(count):
+        description = f"{rng.choice(BRANDS)} {rng.choice(CPUS)} {rng.choice(RAM)} {rng.choice(SSD)} {rng.choice(GPUS)} Win11"
+        price = rng.randrange(900, 3500) + rng.choice([0, 0.49, 0.99])
+        products.append((description, price, f"{seed}-{index}"))
+    return products
+
+
+def lt_decimal(price):
+    """Price with decimal comma: 1899,00"""
+
+    return f"{price:.2f}".replace(".", ",")
+
+
+def lt_price(price):
+    """Price with thousands space and decimal comma: 1 899,00"""
+
+    return f"{price:,.2f}".replace(",", " ").replace(".", ",")
+
+
+def pigu_price(price):
+    """Price with cents in superscript: 1 899<sup>00</sup> €"""
+
+    euros, cents = f"{price:,.2f}".replace(",", " ").split(".")
+    return f'<span class="price">{euros}<sup>{cents}</sup> €</span>'
+
+
+def page(body):
+    """Wrap store markup into full html document with typical page noise around product grid"""
+
+    noise = "".join(f'<div class="banner"><img src="/img/{i}.jpg" alt="banner {i}"><p>Akcija {i}</p></div>' for i in range(30))
+    return f'<!DOCTYPE html><html lang="lt"><head><meta charset="utf-8"><title>Paieška</title></head><body><header>{noise}</header><main>{body}</main><footer>{noise}</footer></body></html>'
+
+
+def hpstore(products):
+    items = "".join(f'<li><a href="https://www.hpstore.lt/p/{pid}" title="{desc}"><img src="/i/{pid}.png"></a><big2>{lt_decimal(price)} €</big2></li>' for desc, price, pid in products)
+    return page(f'<ul class="infogrid products">{items}</ul>')
+
+
+def nesiojami(products):
+    items = "".join(f'<li><a href="https://nesiojami.lt/p/{pid}/"><h2 class="woocommerce-loop-product__title">{desc}</h2></a><span class="price"><bdi>{price:,.2f} €</bdi></span></li>' for desc, price, pid in products)
+    return page(f'<ul class="products columns-4">{items}</ul>')
+
+
+def kilobaitas(products):
+    items = "".join(f'<div class="item-inner"><div class="item-title line-clamp"><a href="/p/{pid}"><p>{desc}</p></a></div><div class="item-price"><meta itemprop="priceCurrency" content="EUR"><meta itemprop="price" content="{price:.2f}"></div></div>' for desc, price, pid in products)
+    return page(f'<div class="products-grid row">{items}</div>')
+
+
+def skytech(products):
+    rows = "".join(f'<tr class="productListing {"odd" if index % 2 else "even"}"><td class="image"><img src="/i/{pid}.jpg"></td><td class="name"><a href="p/{pid}.html">{desc}</a></td><td class="code">SKU{pid}</td><td class="price"><strong>{price:,.2f}€</strong></td></tr>'.replace(f"{price:,.2f}", f"{price:,.2f}".replace(",", " ")) for index, (desc, price, pid) in enumerate(products))
+    return page(f'<table class="productListing"><tr class="productListing-heading"><th>Foto</th><th>Pavadinimas</th><th>Kodas</th><th>Kaina</th></tr>{rows}</table>')
+
+
+def senukai(products):
+    items = []
+    for index, (desc, price, pid) in enumerate(products):
+        discount = f'<span class="ks-new-product-price__price-number">{lt_price(price - 50)}</span>' if index % 5 == 0 else ""
+        items.append(f'<div class="sn-product-inner sn-product-inner--hover ks-gtm-categories"><a class="ks-new-product-name" href="/p/{pid}">{desc}</a><div class="ks-item-price"><span>{lt_price(price)}&nbsp;€</span></div>{discount}</div>')
+    return page(f'<div class="ks-product-grid-row">{"".join(items)}</div>')
+
+
+def one_a(products):
+    items = "".join(f'<div class="catalog-taxons-product__hover"><a class="catalog-taxons-product__name" href="/p/{pid}"> {desc} </a><div class="catalog-taxons-product-price__item-price"><span>{lt_price(price)}</span></div></div>' for desc, price, pid in products)
+    return page(f'<div class="catalog-taxons-products-container__grid-row">{items}</div>')
+
+
+def varle(products):
+    items = "".join(f'<div class="GRID_ITEM"><div class="product-title"><a href="/p/{pid}.html">{desc}</a></div><div class="price-value"><span>{int(price)}</span><sup>99</sup></div></div>' for desc, price, pid in products)
+    return page(f'<div class="grid three-in-row">{items}</div>')
+
+
+def rde(products):
+    half = len(products) // 2
+    tables = "".join('<div class="product-list">' + "".join(f'<div class="product__info"><div class="product__title"><a href="/products/{pid}.html">{desc}\n</a></div><div class="price">{price:.2f} €</div></div>' for desc, price, pid in part) + "</div>" for part in (products[:half], products[half:]))
+    return page(tables)
+
+
+def pigu(products):
+    items = "".join(f'<div class="product-item-inner-hover"><p class="product-name"><a href="/lt/p/{pid}" title="{desc}">{desc}</a></p>{"" if index % 20 == 19 else pigu_price(price)}</div>' for index, (desc, price, pid) in enumerate(products))
+    return page(f'<div class="product-list all-products-visible">{items}</div>')
+
+
+BUILDERS = {
+    "HP store": hpstore,
+    "Nesiojami": nesiojami,
+    "Kilobaitas": kilobaitas,
+    "Skytech": skytech,
+    "Senukai": senukai,
+    "1a": one_a,
+    "Varle": varle,
+    "RDE": rde,
+    "Pigu": pigu,
+}
+
+
+def fixture_path(store_name):
+    """Path of saved page of the store"""
+
+    return os.path.join(FIXTURES_DIR, FIXTURES[store_name][0])
+
+
+def load_fixture(store_name):
+    """Saved page of the store as bytes"""
+
+    with open(fixture_path(store_name), "rb") as file:
+        return file.read()
+
+
+def write_fixtures():
+    """Generate saved pages for all stores"""
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for seed, (store_name, (file_name, count)) in enumerate(FIXTURES.items()):
+        html = BUILDERS[store_name](make_products(count, seed))
+        with open(fixture_path(store_name), "w", encoding="utf-8") as file:
+            file.write(html)
+
+
+def record_fixtures(search_string):
+    """Save live pages of all stores for search string, javascript stores are saved after rendering"""
+
+    import scraping
+
+    http = scraping.HttpClient()
+    driver_pool = scraping.DriverPool(max_size=1)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    try:
+        for store in scraping.STORES:
+            url = store.url(search_string)
+            if store.engine == "http":
+                page = http.get(url).content
+            else:
+                with driver_pool.driver() as driver:
+                    driver.get(url)
+                    scraping.WebDriverWait(driver, store.wait_timeout * 5).until(lambda driver: driver.execute_script(scraping.GetItems.tables_html_script, store.container))
+                    page = driver.page_source.encode("utf-8")
+            with open(fixture_path(store.name), "wb") as file:
+                file.write(page)
+            print(f"{store.name}: {len(page) / 1024:.0f} KB saved")
+    finally:
+        driver_pool.close()
+        http.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Write saved store pages for benchmarks")
+    argument_parser.add_argument("--record", metavar="SEARCH", help="save live store pages for this search instead of generated ones")
+    arguments = argument_parser.parse_args()
+    if arguments.record:
+        record_fixtures(arguments.record)
+    else:
+        write_fixtures()
@@ -0,0 +1,67 @@
+# Local HTTP stand-in for the stores: serves saved store pages from benchmarks/fixtures.
+#
+# Every fixture file is served at /<file name>, query string is ignored, so store search
+# urls can point here for both plain HTTP stores and hidden Chrome.
+# Run from repository root: python -m benchmarks.mock_server [--port 8765] [--latency 0.1]
+
+import argparse
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import FIXTURES_DIR
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Answers GET requests with saved store pages"""
+
+    latency = 0.0 # Seconds added to every answer to imitate network and store server
+
+    def do_GET(self):
+        name = os.path.basename(urlsplit(self.path).path)
+        path = os.path.join(FIXTURES_DIR, name)
+        if not name or not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as file:
+            body = file.read()
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output clean
+
+
+def start_server(port=0, latency=0.0):
+    """Start server in background thread, returns server and its base url"""
+
+    handler = type("Handler", (FixtureHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Serve saved store pages locally")
+    argument_parser.add_argument("--port", type=int, default=8765)
+    argument_parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    arguments = argument_parser.parse_args()
+
+    server, base_url = start_server(arguments.port, arguments.latency)
+    print(f"Serving {FIXTURES_DIR} at {base_url}, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Micro-benchmark of html parser backends on saved store pages.
+#
+# Run from repository root: python -m benchmarks.parser_benchmark [--repeat 20]
+
+import argparse
+import queue
+import statistics
+import time
+from types import SimpleNamespace
+
+from benchmarks.fixtures import load_fixture
+import scraping
+
+def time_backend(items, store, backend, page, repeat):
+    """Median milliseconds of parsing and extracting one store page and products found"""
+
+    parser = scraping.HtmlParser(backend)
+    parse_times, extract_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        doc = parser.parse(page)
+        parsed = time.perf_counter()
+        products = items.extractor.get_items(store, doc)
+        extracted = time.perf_counter()
+        parse_times.append((parsed - start) * 1000)
+        extract_times.append((extracted - parsed) * 1000)
+    return statistics.median(parse_times), statistics.median(extract_times), products
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Compare html parser backends on saved store pages")
+    argument_parser.add_argument("--repeat", type=int, default=20, help="runs per store and backend")
+    arguments = argument_parser.parse_args()
+
+    backends = [backend for backend in scraping.HtmlParser.backends if scraping.HtmlParser.available_backend(backend) == backend]
+    items = scraping.GetItems(SimpleNamespace(queue=queue.Queue()), None)
+    try:
+        print(f"{'Store':<12}{'Backend':<12}{'Parse ms':>10}{'Extract ms':>12}{'Total ms':>10}{'Items':>7}")
+        totals = {backend: 0.0 for backend in backends}
+        for store in scraping.STORES:
+            page = load_fixture(store.name)
+            reference = None
+            for backend in backends:
+                parse_ms, extract_ms, products = time_backend(items, store, backend, page, arguments.repeat)
+                totals[backend] += parse_ms + extract_ms
+                print(f"{store.name:<12}{backend:<12}{parse_ms:>10.2f}{extract_ms:>12.2f}{parse_ms + extract_ms:>10.2f}{len(products):>7}")
+                # Every backend must give the same products
+                if reference is None:
+                    reference = products
+                elif products != reference:
+                    print(f"{'':<12}WARNING: {backend} products differ from {backends[0]}")
+        print()
+        for backend, total in totals.items():
+            print(f"All stores  {backend:<12}{total:>32.2f}")
+    finally:
+        items.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Offline benchmark of the whole scraping pipeline against saved store pages.
+#
+# Stores are pointed to local mock server (benchmarks/mock_server.py), so no live store is
+# touched. Plain HTTP is used for all stores by default, --browser renders javascript
+# stores in hidden Chrome pointed at the same server.
+#
+# Run from repository root:
+#   python -m benchmarks.run_benchmark --searches 20 --save-baseline
+#   python -m benchmarks.run_benchmark --searches 20 --max-regression 10
+
+import argparse
+import dataclasses
+import json
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks.fixtures import FIXTURES, load_fixture
+from benchmarks.mock_server import start_server
+import scraping
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Preset searches of the app
+SEARCHES = [
+    "hp i7 32 gb rtx 3070 ti",
+    "legion i7 32 gb rtx 3070 ti",
+    "hp 32 gb rtx 4060",
+    "legion 32 gb rtx 4060",
+    "HP i7 32 gb rtx 4070",
+    "legion i9 32 gb rtx 4070",
+]
+
+
+def local_stores(base_url, browser):
+    """Store registry pointing to mock server, without cache, pagination and rate limit so every search fetches and parses one page per store"""
+
+    stores = []
+    for store in scraping.STORES:
+        engine = store.engine
+        if engine != "http":
+            engine = "browser" if browser else "http"
+        stores.append(dataclasses.replace(store, url_template=f"{base_url}/{FIXTURES[store.name][0]}?q={{query}}", engine=engine, cache_ttl=0, api=None, pagination=None, rate_limit=None))
+    return stores
+
+
+def percentile(values, percent):
+    """Percentile of values with linear interpolation"""
+
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, None where it cannot be read"""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024 # Bytes on macOS, KB on Linux
+
+
+def benchmark_pipeline(items, searches):
+    """Latency of every GetItems.get_product_list call and products found"""
+
+    latencies, products = [], 0
+    for index in range(searches):
+        start = time.perf_counter()
+        product_list = items.get_product_list(SEARCHES[index % len(SEARCHES)], False)
+        latencies.append(time.perf_counter() - start)
+        products += len(product_list)
+        while not items.app.queue.empty():
+            items.app.queue.get_nowait()
+    return latencies, products
+
+
+def benchmark_extractors(items, repeat):
+    """Median milliseconds of parsing and extracting saved page of every store with its parser"""
+
+    results = {}
+    for store in scraping.STORES:
+        page = load_fixture(store.name)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            items.extractor.get_items(store, items.extractor.parsers[store.parser].parse(page))
+            times.append((time.perf_counter() - start) * 1000)
+        results[store.name] = statistics.median(times)
+    return results
+
+
+def compare(results, baseline):
+    """Print change against baseline, returns worst slowdown of latency in percent"""
+
+    print("\nAgainst baseline:")
+    worst = 0.0
+    for key in ("p50_seconds", "p95_seconds"):
+        change = (results[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0
+        worst = max(worst, change)
+        print(f"  {key:<22}{baseline[key]:>10.3f} -> {results[key]:<10.3f}{change:+.1f}%")
+    for key in ("searches_per_second", "items_per_second"):
+        change = (results[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0
+        print(f"  {key:<22}{baseline[key]:>10.1f} -> {results[key]:<10.1f}{change:+.1f}%")
+    for store_name, milliseconds in results["extract_ms"].items():
+        before = baseline.get("extract_ms", {}).get(store_name)
+        if before:
+            print(f"  extract {store_name:<14}{before:>10.2f} -> {milliseconds:<10.2f}{(milliseconds - before) / before * 100:+.1f}%")
+    return worst
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description="Benchmark scraping pipeline on saved store pages")
+    argument_parser.add_argument("--searches", type=int, default=20, help="searches to run through GetItems.get_product_list")
+    argument_parser.add_argument("--repeat", type=int, default=20, help="runs of every store extractor")
+    argument_parser.add_argument("--latency", type=float, default=0.0, help="seconds mock server adds to every answer")
+    argument_parser.add_argument("--browser", action="store_true", help="render javascript stores in hidden Chrome")
+    argument_parser.add_argument("--incremental", action="store_true", help="reuse products of unchanged store pages (by default every search is extracted)")
+    argument_parser.add_argument("--processes", type=int, default=0, help="worker processes parsing pages (by default pages are parsed by scraping threads)")
+    argument_parser.add_argument("--save-baseline", action="store_true", help=f"save results to {BASELINE_PATH}")
+    argument_parser.add_argument("--max-regression", type=float, default=None, help="exit with error if latency got slower than baseline by more percent")
+    arguments = argument_parser.parse_args()
+
+    server, base_url = start_server(latency=arguments.latency)
+    work_dir = tempfile.mkdtemp(prefix="scraping_benchmark_")
+    items = scraping.GetItems(SimpleNamespace(queue=queue.Queue()), None, cache_dir=work_dir, metrics_dir=work_dir, history_dir=work_dir, stores=local_stores(base_url, arguments.browser), incremental=arguments.incremental, processes=arguments.processes)
+    try:
+        latencies, products = benchmark_pipeline(items, arguments.searches)
+        extract_ms = benchmark_extractors(items, arguments.repeat)
+    finally:
+        items.close()
+        server.shutdown()
+
+    total = sum(latencies)
+    results = {
+        "searches": arguments.searches,
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+        "searches_per_second": arguments.searches / total,
+        "items_per_second": products / total,
+        "peak_rss_mb": peak_rss_mb(),
+        "extract_ms": extract_ms,
+    }
+
+    print(f"Searches: {arguments.searches}, products after filters: {products}")
+    print(f"Latency p50 {results['p50_seconds']:.3f} s, p95 {results['p95_seconds']:.3f} s")
+    print(f"Throughput {results['searches_per_second']:.1f} searches/s, {results['items_per_second']:.0f} items/s")
+    if results["peak_rss_mb"] is not None:
+        print(f"Peak RSS {results['peak_rss_mb']:.0f} MB")
+    print("Parse and extract, median ms:")
+    for store_name, milliseconds in extract_ms.items():
+        print(f"  {store_name:<14}{milliseconds:>8.2f}")
+
+    if arguments.save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as file:
+            worst = compare(results, json.load(file))
+        if arguments.max_regression is not None and worst > arguments.max_regression:
+            print(f"\nLatency regression {worst:.1f}% is over allowed {arguments.max_regression}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,60 @@
 # The app is created with the goal of learning python coding.
 
-import sys
-print(sys.path)
-
 # App for scraping top Lithuanian web-stores for gaming computer and their prices by Tomas Suslavicius.
 
 # Import necessary libraries
+import time
+start_time = time.perf_counter() # Start of the app, time to first window is measured from here
+
+import sys
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import os
 import textwrap
 import webbrowser
-from threading import Thread
-import time
+from threading import Thread, Lock, Event, BoundedSemaphore, local
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, CancelledError, wait
+from functools import partial
+from dataclasses import dataclass, field, fields, astuple, asdict
+import asyncio
+import multiprocessing
 import queue
-
-from bs4 import BeautifulSoup # BeautifulSoup in app used for simple sites without javascript
-import requests
-from requests.exceptions import RequestException
-
-from selenium import webdriver # Selenium used for sites empowered with javascript
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.chrome.options import Options
+import bisect
+from collections import deque
+import heapq
+import argparse
+import csv
+import sqlite3
+import zlib
+import json
+import hashlib
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+# Heavy scraping libraries are imported by load_scraping_libraries: in background while window opens, before first search
+BeautifulSoup = None # BeautifulSoup in app used for parsing store pages with html.parser and lxml
+requests = HTTPAdapter = RequestException = Retry = None
+webdriver = WebDriverWait = TimeoutException = Options = None # Selenium used for sites empowered with javascript
+scraping_libraries_lock = Lock()
+
+def load_scraping_libraries():
+    """Import bs4, requests and selenium once, waits if another thread is importing them"""
+
+    global BeautifulSoup, requests, HTTPAdapter, RequestException, Retry, webdriver, WebDriverWait, TimeoutException, Options
+    with scraping_libraries_lock:
+        if requests is not None:
+            return
+        from bs4 import BeautifulSoup
+        from requests.adapters import HTTPAdapter
+        from requests.exceptions import RequestException
+        from urllib3.util.retry import Retry
+        from selenium import webdriver
+        from selenium.webdriver.support.wait import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.chrome.options import Options
+        import requests
 
 # Set DPI Awareness
 try:
@@ -64,13 +93,23 @@ class Logos(ttk.LabelFrame):
         # Insert picture logos into canvas widget
         self.img_ref = [] # To save image references from python garbage collection
         for index, logo in enumerate(self.list_of_logos):
-            file_path = f"images/{logo}"
-            logo_original = Image.open(file_path)
-            resized_logo = logo_original.resize((200, 50), Image.Resampling.LANCZOS)
-            logo_image_tk = ImageTk.PhotoImage(resized_logo)
+            logo_image_tk = tk.PhotoImage(file=self.thumbnail(f"images/{logo}"))
             canvas.create_image(0, 50 * index, image=logo_image_tk, anchor='nw')
             self.img_ref.append(logo_image_tk)
 
+    def thumbnail(self, file_path, thumbnails_dir=os.path.join("cache", "logos")):
+        """Path of 200x50 PNG copy of the logo, it is made again only when the logo file changes"""
+
+        thumbnail_path = os.path.join(thumbnails_dir, os.path.splitext(os.path.basename(file_path))[0] + ".png")
+        if os.path.exists(thumbnail_path) and os.path.getmtime(thumbnail_path) >= os.path.getmtime(file_path):
+            return thumbnail_path
+
+        from PIL import Image # Pillow is needed only to resize new or changed logos
+        os.makedirs(thumbnails_dir, exist_ok=True)
+        with Image.open(file_path) as logo_original:
+            logo_original.resize((200, 50), Image.Resampling.LANCZOS).save(thumbnail_path, "PNG")
+        return thumbnail_path
+
 #################################################
 # Create search buttons and search entry widget #
 #################################################
@@ -172,11 +211,16 @@ class LogArea(ttk.LabelFrame):
     def insert_log_message(self, message):
         """Insert log messages in log area"""
 
-        self.message = message
-        lines = textwrap.wrap(self.message, 64)
+        self.insert_log_messages([message])
+
+    def insert_log_messages(self, messages):
+        """Insert many log messages with one widget update"""
+
+        lines = [line for message in messages for line in textwrap.wrap(message, 64)]
+        if not lines:
+            return
         self.log_area.config(state='normal')
-        for line in lines:
-            self.log_area.insert('end', f"{line}\n")
+        self.log_area.insert('end', "".join(f"{line}\n" for line in lines))
         self.log_area.config(state='disabled')
         self.log_area.see('end')
 
@@ -214,13 +258,32 @@ class ShowResults(tk.Toplevel):
         self.result_area.tag_configure("boldred", font=("TkDefaultFont", 12, "bold"), foreground="red")
         self.result_area.tag_configure("boldgrey", font=("TkDefaultFont", 12, "bold"), foreground="grey")
         self.result_area.tag_configure("red", foreground="red")
+        self.result_area.tag_configure("grey", foreground="grey")
         self.result_area.tag_configure("link", foreground="blue", underline=True)
 
+        # One tag for all links, clicked link is found by its line, see link_at
+        self.result_area.tag_bind("link", '<Button>', self.click_link)
+        self.result_area.tag_bind("link", '<Enter>', self.enter_link)
+        self.result_area.tag_bind("link", '<Leave>', self.leave_link)
+
+        # Products waiting to be shown, they are inserted in chunks when Tk is idle
+        self.pending = []
+        self.render_scheduled = False
+        self.finished = False
 
-    def bind_link(self, url):
-        """Bind function 'open_link' with tag of the web link part of the text"""
+    def link_at(self, event):
+        """Url of the product shown at mouse position"""
 
-        return lambda e: self.app.open_link(url)
+        line = int(self.result_area.index(f"@{event.x},{event.y}").split(".")[0])
+        position = (line - 3) // 4 # Products take four lines after two lines of label
+        return self.links[position] if 0 <= position < len(self.links) else None
+
+    def click_link(self, event):
+        """Open link pressed in default browser"""
+
+        url = self.link_at(event)
+        if url:
+            self.app.open_link(url)
 
     def enter_link(self, event):
         """Change mouse cursor to 'hand' when over the link"""
@@ -235,33 +298,1644 @@ class ShowResults(tk.Toplevel):
     def insert_results(self, product_list, search_string):
         """Insert search results in the result window"""
 
-        # Allow to insert text
-        self.result_area.config(state='normal')
+        self.start_results(search_string)
+        self.add_results(product_list)
+        self.finish_results()
 
-        # Insert label for what was searched
+    def start_results(self, search_string):
+        """Insert label for what was searched, products of stores are added later as they come"""
+
+        self.prices = [] # Best prices of shown products in the same order as in the window
+        self.groups = [] # Root of product group of every shown product, see ProductMatcher
+        self.links = [] # Link of every shown product
+        self.matcher = ProductMatcher()
         self.search_string = search_string
+        self.result_area.config(state='normal')
         self.result_area.insert('end', f"                                        SEARCH RESULTS FOR: {self.search_string}\n\n", "boldgrey")
+        self.result_area.config(state='disabled')
 
-        # Show info message if no rezults found
-        if len(product_list) == 0:
-            self.result_area.insert('end', f"                                        NO RESULTS IN PRICE RANGE 1800-2400€", "boldred")
+    def add_results(self, product_list):
+        """Queue products of one store, they are shown in chunks so the window stays responsive"""
+
+        self.pending.extend(product_list)
+        self.schedule_render()
+
+    def schedule_render(self):
+        """Render next chunk of products when Tk has nothing else to do"""
+
+        if not self.render_scheduled and self.winfo_exists():
+            self.render_scheduled = True
+            self.after_idle(self.render_pending)
+
+    def render_pending(self, chunk_size=200):
+        """Insert one chunk of queued products, the rest waits for the next idle time"""
 
-        # Show product list in result window    
+        self.render_scheduled = False
+        if not self.winfo_exists(): # Window closed while search still running
+            return
+        chunk, self.pending = self.pending[:chunk_size], self.pending[chunk_size:]
+        self.insert_products(chunk)
+        if self.pending:
+            self.schedule_render()
+        elif self.finished:
+            self.show_finished()
+
+    def insert_products(self, product_list):
+        """Insert products keeping the whole list sorted by price, the same product from other stores is shown once"""
+
+        # Allow to insert text
+        self.result_area.config(state='normal')
+
+        # Every product takes four lines after two lines of label, so product at position N starts at line 3 + 4 * N
         for item in product_list:
-            self.result_area.insert('end', f"{item['Description']}\n", "bold")
-            self.result_area.insert('end', f"          {item['Price']}\n", "boldred")
-            tag = f"link-{item['Link']}"
-            self.result_area.insert('end', f"{item['Link']}\n\n", (tag, "link"))
-            self.result_area.tag_bind(tag, '<Button>', self.bind_link(item['Link']))
-            self.result_area.tag_bind(tag, '<Enter>', self.enter_link)
-            self.result_area.tag_bind(tag, '<Leave>', self.leave_link)
-        
+            root, previous_roots = self.matcher.add(item)
+
+            # Groups joined by this product are removed and shown again as one product with the best price
+            for position in sorted((self.groups.index(group) for group in previous_roots), reverse=True):
+                self.result_area.delete(f"{3 + 4 * position}.0", f"{7 + 4 * position}.0")
+                del self.prices[position]
+                del self.groups[position]
+                del self.links[position]
+            offers = self.matcher.offers(root)
+            best = offers[0]
+            other_offers = f"    best of {len(offers)} offers, up to {offers[-1].price}" if len(offers) > 1 else ""
+
+            position = bisect.bisect_right(self.prices, best.price)
+            self.prices.insert(position, best.price)
+            self.groups.insert(position, root)
+            self.links.insert(position, best.link)
+            self.result_area.insert(
+                f"{3 + 4 * position}.0",
+                f"{clean_spaces(best.description)}\n", "bold", # Every product takes exactly four lines
+                f"          {best.price}", "boldred",
+                f"{other_offers}\n", "grey",
+                f"{best.link}\n\n", "link",
+            )
+
         # Restrict editing in result window
         self.result_area.config(state='disabled')
 
+    def finish_results(self):
+        """Show info message if no results found and tell that search is finished, after queued products are shown"""
+
+        self.finished = True
+        if not self.winfo_exists():
+            return
+        if self.pending or self.render_scheduled:
+            return # render_pending calls show_finished after the last chunk
+        self.show_finished()
+
+    def show_finished(self):
+        """Show info message if no results found and tell that search is finished"""
+
+        # Show info message if no rezults found
+        if len(self.prices) == 0:
+            self.result_area.config(state='normal')
+            self.result_area.insert('end', f"                                        NO RESULTS IN PRICE RANGE 1800-2400€", "boldred")
+            self.result_area.config(state='disabled')
+
         # Show log message
         self.log_area.insert_log_message("Results are presented in separate window 'Search Results'")
 
+#####################################################
+# Shared HTTP session for stores without javascript #
+#####################################################
+
+class HttpClient():
+    """Long-lived requests session with pooled keep-alive connections, retries and compression"""
+
+    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/112.0"
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, retries=3, backoff_factor=0.5, timeout=5):
+
+        self.timeout = timeout
+
+        # Retry transient server errors and timeouts with growing pause: 0.5s, 1s, 2s...
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+        )
+
+        # One connection pool per store host (pool_connections) with up to pool_maxsize kept-alive connections each
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": self.user_agent, "Accept-Encoding": self.accept_encoding()})
+
+    def accept_encoding(self):
+        """Ask for brotli only when it can be decoded (brotli package installed)"""
+
+        try:
+            import brotli
+        except ImportError:
+            try:
+                import brotlicffi
+            except ImportError:
+                return "gzip, deflate"
+        return "gzip, deflate, br"
+
+    def get(self, url, headers=None, timeout=None):
+        """GET request over pooled connection"""
+
+        return self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+
+    def close(self):
+        """Close all pooled connections"""
+
+        self.session.close()
+
+##########################################################
+# HTML parser backends: html.parser, lxml and selectolax #
+##########################################################
+
+class HtmlNode(ABC):
+    """Small common interface over parsed html elements, store extractors use only this"""
+
+    __slots__ = () # Subclasses keep only the wrapped element, without __dict__
+
+    @abstractmethod
+    def select(self, css):
+        """All descendant elements matching CSS selector"""
+
+    @abstractmethod
+    def select_one(self, css):
+        """First descendant element matching CSS selector or None"""
+
+    @abstractmethod
+    def attr(self, name):
+        """Value of element attribute or None"""
+
+    @abstractmethod
+    def text(self):
+        """Text of element and all its children"""
+
+    @abstractmethod
+    def html(self):
+        """Html of element itself"""
+
+
+class SoupNode(HtmlNode):
+    """BeautifulSoup element, used with html.parser and lxml backends"""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        return [SoupNode(node) for node in self.node.select(css)]
+
+    def select_one(self, css):
+        node = self.node.select_one(css)
+        return SoupNode(node) if node is not None else None
+
+    def attr(self, name):
+        return self.node.get(name)
+
+    def text(self):
+        return self.node.get_text()
+
+    def html(self):
+        return str(self.node)
+
+
+class LexborNode(HtmlNode):
+    """selectolax element, parsed by fast C engine (lexbor or modest)"""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        return [LexborNode(node) for node in self.node.css(css)]
+
+    def select_one(self, css):
+        node = self.node.css_first(css)
+        return LexborNode(node) if node is not None else None
+
+    def attr(self, name):
+        return self.node.attributes.get(name)
+
+    def text(self):
+        return self.node.text(deep=True)
+
+    def html(self):
+        return self.node.html or ""
+
+
+class HtmlParser():
+    """Parses store pages with selected backend, missing optional backend falls back to the next fastest one"""
+
+    backends = ("selectolax", "lxml", "html.parser") # From the fastest to the slowest
+
+    def __init__(self, backend="html.parser"):
+
+        load_scraping_libraries() # BeautifulSoup for html.parser and lxml backends
+        self.requested_backend = backend
+        self.backend = self.available_backend(backend)
+
+    @classmethod
+    def available_backend(cls, backend):
+        """Return requested backend if installed, otherwise the fastest installed one after it"""
+
+        for candidate in cls.backends[cls.backends.index(backend):]:
+            if candidate == "selectolax":
+                try:
+                    import selectolax
+                except ImportError:
+                    continue
+            elif candidate == "lxml":
+                try:
+                    import lxml
+                except ImportError:
+                    continue
+            return candidate
+        return "html.parser"
+
+    def parse(self, page):
+        """Parse page html (bytes or str) into root HtmlNode"""
+
+        if self.backend == "selectolax":
+            try:
+                from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+            except ImportError:
+                from selectolax.parser import HTMLParser as SelectolaxParser
+            return LexborNode(SelectolaxParser(page).root)
+        return SoupNode(BeautifulSoup(page, self.backend))
+
+####################################################################
+# Rate limit, adaptive timeouts and circuit breaker of every store #
+####################################################################
+
+class StorePolicy():
+    """Limits request rate to one store, learns its timeouts from recent latencies and skips it for a while after repeated failures"""
+
+    def __init__(self, rate_limit=2.0, burst=5, failure_threshold=3, cooldown=300, samples=50):
+
+        # Token bucket: up to burst requests at once, then rate_limit requests per second
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+        # Seconds of recent successful loads by kind ("http", "browser")
+        self.samples = samples
+        self.latencies = {}
+
+        # Circuit breaker: after failure_threshold failures in a row the store is skipped for cooldown seconds
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+
+        self.lock = Lock()
+
+    def throttle(self):
+        """Wait for a free request of the rate limit, returns seconds waited"""
+
+        if not self.rate_limit:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_limit)
+            self.updated = now
+            self.tokens -= 1 # Taken in advance, so waiting requests keep their order
+            delay = -self.tokens / self.rate_limit if self.tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def timeout(self, kind, default, minimum=2.0, factor=3):
+        """Timeout of the next load: slowest recent loads (95th percentile) times factor, not longer than default"""
+
+        with self.lock:
+            latencies = sorted(self.latencies.get(kind, ()))
+        if len(latencies) < 5: # Too few loads to learn from
+            return default
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return min(default, max(minimum, p95 * factor))
+
+    def allow(self):
+        """True if store may be scraped, after cooldown one trial search is let through"""
+
+        with self.lock:
+            if self.failures < self.failure_threshold:
+                return True
+            now = time.monotonic()
+            if now < self.open_until:
+                return False
+            self.open_until = now + self.cooldown # Other searches wait for the result of the trial
+            return True
+
+    def cooldown_left(self):
+        """Seconds until store is tried again"""
+
+        return max(0.0, self.open_until - time.monotonic())
+
+    def add_latency(self, kind, seconds):
+        """Remember seconds of successful load"""
+
+        with self.lock:
+            self.latencies.setdefault(kind, deque(maxlen=self.samples)).append(seconds)
+
+    def success(self):
+        """Store answered in a search, close the circuit"""
+
+        with self.lock:
+            self.failures = 0
+            self.open_until = 0.0
+
+    def failure(self):
+        """Count search in which store failed, returns True if it opened the circuit"""
+
+        with self.lock:
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return False
+            self.open_until = time.monotonic() + self.cooldown
+            return self.failures == self.failure_threshold
+
+#################################
+# On-disk cache of stores pages #
+#################################
+
+class PageCache():
+    """Keeps compressed html of store pages in SQLite file, old pages are dropped by TTL and least recently used first"""
+
+    def __init__(self, path=os.path.join("cache", "pages.sqlite3"), max_size_mb=100):
+
+        self.max_size = max_size_mb * 1024 * 1024
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # One connection shared by worker threads, guarded by lock
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    page BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+            # Products last extracted from a store page with fingerprints of the page and its product tables
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    key TEXT PRIMARY KEY,
+                    page_hash TEXT NOT NULL,
+                    content_hash TEXT,
+                    products BLOB NOT NULL,
+                    pages INTEGER NOT NULL DEFAULT 1,
+                    stored_at REAL NOT NULL
+                )""")
+            if "pages" not in [column[1] for column in self.connection.execute("PRAGMA table_info(snapshots)")]: # Cache made before pagination
+                self.connection.execute("ALTER TABLE snapshots ADD COLUMN pages INTEGER NOT NULL DEFAULT 1")
+
+    def key(self, url, selector=""):
+        """Cache key from normalized url (lower case host, sorted query, no fragment) and CSS selector"""
+
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        normalized_url = urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+        return f"{normalized_url} {selector}".strip()
+
+    def get(self, key):
+        """Return cached page with its validators or None, marks page as recently used"""
+
+        with self.lock:
+            row = self.connection.execute("SELECT page, etag, last_modified, stored_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self.connection:
+                self.connection.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        page, etag, last_modified, stored_at = row
+        return {"page": zlib.decompress(page), "etag": etag, "last_modified": last_modified, "stored_at": stored_at}
+
+    def is_fresh(self, entry, ttl):
+        """Check if cached page is younger than store TTL in seconds"""
+
+        return time.time() - entry["stored_at"] < ttl
+
+    def put(self, key, page, etag=None, last_modified=None):
+        """Store compressed page and drop least recently used pages over the size cap"""
+
+        compressed = zlib.compress(page, 6)
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (key, page, size, etag, last_modified, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, compressed, len(compressed), etag, last_modified, now, now),
+            )
+            self.evict()
+
+    def touch(self, key):
+        """Mark cached page as fresh again after server confirmed it did not change (HTTP 304)"""
+
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE pages SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def get_snapshot(self, key):
+        """Return products last extracted for the key with fingerprints, or None"""
+
+        with self.lock:
+            row = self.connection.execute("SELECT page_hash, content_hash, products, pages FROM snapshots WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        page_hash, content_hash, products, pages = row
+        rows = json.loads(zlib.decompress(products))
+        if rows and (not isinstance(rows[0], list) or len(rows[0]) != len(fields(Product))): # Stored by older version of the app
+            return None
+        return {"page_hash": page_hash, "content_hash": content_hash, "products": [Product(*row) for row in rows], "pages": pages}
+
+    def put_snapshot(self, key, page_hash, content_hash, product_list, pages=1):
+        """Store products extracted from the page together with its fingerprints and number of result pages"""
+
+        products = zlib.compress(json.dumps([astuple(product) for product in product_list], ensure_ascii=False).encode("utf-8"), 6)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO snapshots (key, page_hash, content_hash, products, pages, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, page_hash, content_hash, products, pages, time.time()),
+            )
+
+    def evict(self):
+        """Delete least recently used pages while cache is bigger than max size"""
+
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        for key, size in self.connection.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+            self.connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    def close(self):
+        """Close cache file"""
+
+        with self.lock:
+            self.connection.close()
+
+##########################################
+# Price history of products in SQLite db #
+##########################################
+
+# Brands recognized in search strings and product descriptions
+BRANDS = ("hp", "lenovo", "dell", "acer", "asus", "gigabyte", "msi", "razer")
+
+class PriceHistory():
+    """Keeps every product found with timestamped prices, so price movement is seen without scraping again"""
+
+    # Query parameters that only track visitors and do not change the product
+    tracking_parameters = ("utm_", "gclid", "fbclid", "ref", "srsltid")
+
+    def __init__(self, path=os.path.join("history", "prices.sqlite3")):
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # One connection shared by worker threads, guarded by lock
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY,
+                    search TEXT NOT NULL,
+                    started_at REAL NOT NULL
+                )""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY,
+                    store TEXT NOT NULL,
+                    link TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    brand TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    last_price REAL NOT NULL,
+                    UNIQUE (store, link)
+                )""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS observations (
+                    product_id INTEGER NOT NULL REFERENCES products (id),
+                    run_id INTEGER NOT NULL REFERENCES runs (id),
+                    price REAL NOT NULL,
+                    observed_at REAL NOT NULL
+                )""")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS runs_search ON runs (search, started_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS products_store ON products (store)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS products_brand ON products (brand)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS products_last_price ON products (last_price)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS observations_price ON observations (price, observed_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS observations_run ON observations (run_id, product_id)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS observations_product ON observations (product_id, observed_at)")
+
+    def normalize_link(self, url):
+        """Product key: lower case host, no fragment, no trailing slash and no tracking parameters"""
+
+        parts = urlsplit(url.strip())
+        query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if not name.lower().startswith(self.tracking_parameters)))
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", query, ""))
+
+    def brand(self, description):
+        """First known brand named in product description"""
+
+        words = description.lower()
+        for brand_name in BRANDS:
+            if brand_name in words:
+                return brand_name
+        return None
+
+    def record(self, search_string, product_list):
+        """Write products of all stores found in one search in a single transaction, returns run id"""
+
+        now = time.time()
+
+        # One row per store and product link, the same product listed twice on a page is observed once
+        rows = {}
+        for item in product_list:
+            if item.placeholder: # 'Not found' message has no price
+                continue
+            rows[(item.store, self.normalize_link(item.link))] = (item.description, item.price)
+
+        with self.lock, self.connection:
+            run_id = self.connection.execute("INSERT INTO runs (search, started_at) VALUES (?, ?)", (search_string, now)).lastrowid
+            self.connection.executemany("""
+                INSERT INTO products (store, link, description, brand, first_seen, last_seen, last_price) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (store, link) DO UPDATE SET
+                    description = excluded.description, brand = excluded.brand, last_seen = excluded.last_seen, last_price = excluded.last_price""",
+                [(store_name, link, description, self.brand(description), now, now, price) for (store_name, link), (description, price) in rows.items()])
+            self.connection.executemany(
+                "INSERT INTO observations (product_id, run_id, price, observed_at) SELECT id, ?, ?, ? FROM products WHERE store = ? AND link = ?",
+                [(run_id, price, now, store_name, link) for (store_name, link), (_, price) in rows.items()])
+        return run_id
+
+    def cheapest_in_range(self, min_price, max_price, days=7, store=None, brand=None, limit=50):
+        """Products with lowest price in range seen during last days, cheapest first"""
+
+        conditions = ["o.observed_at >= ?", "o.price BETWEEN ? AND ?"]
+        parameters = [time.time() - days * 86400, min_price, max_price]
+        if store:
+            conditions.append("p.store = ?")
+            parameters.append(store)
+        if brand:
+            conditions.append("p.brand = ?")
+            parameters.append(brand.lower())
+        parameters.append(limit)
+        with self.lock:
+            rows = self.connection.execute(f"""
+                SELECT p.store, p.description, p.link, MIN(o.price) AS price, MAX(o.observed_at)
+                FROM observations o JOIN products p ON p.id = o.product_id
+                WHERE {" AND ".join(conditions)}
+                GROUP BY o.product_id
+                ORDER BY price
+                LIMIT ?""", parameters).fetchall()
+        return [{"Store": store_name, "Description": description, "Price": price, "Link": link, "Seen": seen} for store_name, description, link, price, seen in rows]
+
+    def price_drops(self, search_string):
+        """Products of the last run of a search that got cheaper than in the run before it, biggest drop first"""
+
+        with self.lock:
+            runs = self.connection.execute("SELECT id FROM runs WHERE search = ? ORDER BY started_at DESC LIMIT 2", (search_string,)).fetchall()
+            if len(runs) < 2:
+                return []
+            rows = self.connection.execute("""
+                SELECT p.store, p.description, p.link, MIN(previous.price), MIN(latest.price)
+                FROM observations latest
+                JOIN observations previous ON previous.product_id = latest.product_id AND previous.run_id = ?
+                JOIN products p ON p.id = latest.product_id
+                WHERE latest.run_id = ?
+                GROUP BY latest.product_id
+                HAVING MIN(latest.price) < MIN(previous.price)
+                ORDER BY MIN(latest.price) - MIN(previous.price)""", (runs[1][0], runs[0][0])).fetchall()
+        return [{"Store": store_name, "Description": description, "Old price": old_price, "Price": price, "Link": link} for store_name, description, link, old_price, price in rows]
+
+    def close(self):
+        """Close history file"""
+
+        with self.lock:
+            self.connection.close()
+
+####################################################
+# Pool of warm hidden Chrome browsers for Selenium #
+####################################################
+
+class DriverPool():
+    """Keeps hidden Chrome browsers alive between stores and searches and lends them to Selenium stores"""
+
+    # Longest seconds driver.get waits for a page, stores with known latencies get shorter timeout from StorePolicy
+    page_load_timeout = 30
+
+    # Chrome switches turning off features not needed to read product tables
+    chrome_arguments = (
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-dev-shm-usage",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--disable-notifications",
+        "--mute-audio",
+        "--no-first-run",
+        "--blink-settings=imagesEnabled=false",
+    )
+
+    # Chrome profile settings: 2 means blocked
+    chrome_prefs = {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.default_content_setting_values.geolocation": 2,
+    }
+
+    # Requests Chrome does not make at all: images, media, fonts, styles and trackers
+    blocked_urls = (
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+        "*.mp4", "*.webm", "*.mp3",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.css",
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+        "*facebook.net*", "*facebook.com/tr*", "*hotjar.com*", "*clarity.ms*", "*criteo.com*", "*criteo.net*",
+        "*tiktok.com*", "*adform.net*", "*cookiebot.com*", "*onesignal.com*", "*omnisend.com*",
+    )
+
+    def __init__(self, max_size=5, idle_timeout=300, reap_interval=30, lightweight=True):
+
+        # Max number of browsers alive at once and seconds an unused browser is kept warm
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.lightweight = lightweight # Browsers load only html and scripts, see blocked_urls
+
+        self.idle_drivers = [] # Browsers waiting for the next store: (driver, time released)
+        self.lock = Lock()
+        self.slots = BoundedSemaphore(max_size)
+        self.closed = False
+
+        # Background thread closes browsers that stayed unused longer than idle timeout
+        self.stop_event = Event()
+        self.reaper = Thread(target=self.reap_idle_drivers, args=(reap_interval,), daemon=True)
+        self.reaper.start()
+
+    def create_driver(self):
+        """Launch new hidden Chrome browser"""
+
+        options = Options()
+        options.add_argument('--headless')
+        options.add_argument('--window-size=1920,1080') # Instead of maximize_window, saves one WebDriver call
+        if self.lightweight:
+            for argument in self.chrome_arguments:
+                options.add_argument(argument)
+            options.add_experimental_option("prefs", self.chrome_prefs)
+            options.page_load_strategy = "eager" # driver.get returns when html is parsed, product tables are waited for separately
+        driver = webdriver.Chrome(options=options)
+        if self.lightweight:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(self.blocked_urls)})
+        # No implicit wait: product tables are awaited explicitly, missing elements fail at once
+        driver.implicitly_wait(0)
+        return driver
+
+    @contextmanager
+    def driver(self):
+        """Lend browser for one store and take it back to the pool afterwards"""
+
+        self.slots.acquire() # Waits here while all max_size browsers are busy
+        try:
+            driver = self.acquire()
+            try:
+                yield driver
+            finally:
+                self.release(driver)
+        finally:
+            self.slots.release()
+
+    def acquire(self):
+        """Take the most recently used warm browser or launch a new one"""
+
+        self.evict_idle()
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Browser pool is closed")
+            if self.idle_drivers:
+                driver, _ = self.idle_drivers.pop()
+                return driver
+        return self.create_driver()
+
+    def release(self, driver):
+        """Reset browser state and put it back to the pool, broken browsers are closed"""
+
+        try:
+            self.reset_driver(driver)
+        except Exception:
+            self.quit_driver(driver)
+            return
+        with self.lock:
+            if not self.closed:
+                self.idle_drivers.append((driver, time.monotonic()))
+                return
+        self.quit_driver(driver)
+
+    def reset_driver(self, driver):
+        """Close extra tabs and clear cookies so next store starts from clean browser"""
+
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def evict_idle(self):
+        """Close browsers unused for longer than idle timeout"""
+
+        now = time.monotonic()
+        with self.lock:
+            expired = [driver for driver, released in self.idle_drivers if now - released > self.idle_timeout]
+            self.idle_drivers = [(driver, released) for driver, released in self.idle_drivers if now - released <= self.idle_timeout]
+        for driver in expired:
+            self.quit_driver(driver)
+
+    def reap_idle_drivers(self, interval):
+        """Loop of the background thread that evicts idle browsers"""
+
+        while not self.stop_event.wait(interval):
+            self.evict_idle()
+
+    def quit_driver(self, driver):
+        """Close Chrome browser ignoring errors of already dead browsers"""
+
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        """Close all browsers, browsers still in use are closed when given back"""
+
+        self.stop_event.set()
+        with self.lock:
+            self.closed = True
+            drivers = [driver for driver, _ in self.idle_drivers]
+            self.idle_drivers = []
+        for driver in drivers:
+            self.quit_driver(driver)
+
+###########################################################
+# Identical fetches of concurrent searches share one load #
+###########################################################
+
+class SingleFlight():
+    """Runs one call per key at a time, callers asking for the same key meanwhile wait and get its result"""
+
+    def __init__(self):
+
+        self.calls = {} # Key: Future of the call in progress
+        self.lock = Lock()
+
+    def do(self, key, function):
+        """Result of function for key and True if it was shared from a call already in progress"""
+
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # Next call with the same key is made again, by then page is served from cache
+            with self.lock:
+                del self.calls[key]
+        return future.result(), False
+
+#################################################
+# Asyncio scraping engine running in background #
+#################################################
+
+class ScrapeEngine():
+    """Runs blocking store scraping jobs concurrently on asyncio event loop in background thread"""
+
+    def __init__(self, max_workers=9):
+
+        # Blocking HTTP and Selenium work runs in worker threads, event loop only schedules and times it
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self.executor)
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+        # Searches in progress, cancelled when the app closes
+        self.runs = set()
+        self.closed = False
+        self.lock = Lock()
+
+    def run(self, jobs, on_done=None):
+        """Run jobs [(name, function(abandoned Event), timeout seconds)] and wait for all of them, result of timed out job is None"""
+
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Scrape engine is closed")
+            future = asyncio.run_coroutine_threadsafe(self.run_jobs(jobs, on_done), self.loop)
+            self.runs.add(future)
+        try:
+            return future.result()
+        except CancelledError:
+            raise RuntimeError("Scrape engine is closed") from None
+        finally:
+            with self.lock:
+                self.runs.discard(future)
+
+    async def run_jobs(self, jobs, on_done):
+        """Start all jobs at once and report every job through on_done(name, result) as soon as it finishes"""
+
+        async def run_job(name, function, timeout):
+            started = asyncio.Event()
+            abandoned = Event()
+
+            def job():
+                self.loop.call_soon_threadsafe(started.set)
+                return function(abandoned)
+
+            # Timeout counts from the moment a worker thread takes the job, not while it waits for a free one
+            future = self.loop.run_in_executor(self.executor, job)
+            await started.wait()
+            try:
+                return name, await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                abandoned.set() # Worker thread can not be stopped, it finishes without reporting
+                return name, None
+
+        results = {}
+        for finished in asyncio.as_completed([run_job(name, function, timeout) for name, function, timeout in jobs]):
+            name, result = await finished
+            results[name] = result
+            if on_done and result is not None:
+                try:
+                    on_done(name, result)
+                except Exception:
+                    pass # Broken listener must not stop other stores
+        return results
+
+    def close(self):
+        """Cancel searches in progress, stop event loop and worker threads"""
+
+        with self.lock:
+            self.closed = True
+            runs = list(self.runs)
+        for future in runs:
+            future.cancel() # Waiting run() raises at once
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.cancel_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def cancel_tasks(self):
+        """Cancel jobs of all searches and wait until they finish"""
+
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+###########################
+# Product found in a store #
+###########################
+
+@dataclass(slots=True)
+class Product:
+    """One product of store search results, used from extraction to result window"""
+
+    description: str
+    price: float
+    link: str
+    store: str = "" # Name of the store in STORES registry
+    timestamp: float = field(default=0.0, compare=False) # Time product was extracted from the page
+    placeholder: bool = field(default=False, compare=False) # 'Not found' message of the store, not a real product
+
+##############################################
+# Registry of stores: how to scrape each one #
+##############################################
+
+def price_comma(text):
+    """Price like '1 899,00 €' or '1899,00'"""
+
+    return float(text.replace("\xa0", "").replace(" ", "").replace("€", "").replace(",", "."))
+
+
+def price_first_word(text):
+    """Price like '1899,00 €', only the first word is the number"""
+
+    return float(text.split(" ")[0].replace(",", "."))
+
+
+def price_thousands_comma(text):
+    """Price like '1,899.00 €'"""
+
+    return float(text.replace(",", "").replace(" €", ""))
+
+
+def price_plain(text):
+    """Price like '1 899.00€' or '1899.00 €'"""
+
+    return float(text.replace(" ", "").replace("€", "").strip())
+
+
+def price_varle(text):
+    """Varle shows whole euros, cents are always 99"""
+
+    return float(text.strip()) + 0.99
+
+
+def price_cents(text):
+    """Price like '1 89900 €' where last two digits are cents"""
+
+    return float(text.replace(" ", "").replace("€", "").strip()) / 100
+
+
+def clean_spaces(text):
+    """Join text of element into one line"""
+
+    return " ".join(text.split())
+
+
+def clean_varle(text):
+    """Varle title has '| ' separators between its parts"""
+
+    return " ".join(text.split()).replace("| ", "")
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Where to find one product field inside product element"""
+
+    selector: tuple # CSS selectors tried in order, the first one found is used
+    attr: str = "text" # "text" or name of element attribute
+    index: int = 0 # Which of matching elements to use
+    clean: object = clean_spaces # Function to tidy text value
+
+    def value(self, item):
+        """Field value from product element or None if element is missing"""
+
+        for selector in self.selector:
+            elements = item.select(selector) if self.index else [item.select_one(selector)]
+            if len(elements) > self.index and elements[self.index] is not None:
+                element = elements[self.index]
+                value = element.text() if self.attr == "text" else element.attr(self.attr)
+                return self.clean(value) if value is not None else None
+        return None
+
+
+@dataclass(frozen=True)
+class StoreSpec:
+    """Everything the scraping engine needs to know about one store"""
+
+    name: str
+    label: str # Store name used in 'not found' message
+    home_url: str # Base for relative product links
+    url_template: str # Search url, {query} is replaced with encoded search string
+    engine: str # "http" - plain request, "browser" - hidden Chrome, "api" - plain HTTP API mode with browser fallback
+    container: str # CSS selector of product table
+    items: str # CSS selector of product element inside product table
+    description: FieldSpec
+    link: FieldSpec
+    price: FieldSpec
+    price_normalizer: object
+    query_space: str = "+" # How spaces are encoded in search string
+    multiple_containers: bool = False # Page has several product tables
+    not_found_text: str = "" # Text in product table meaning nothing was found
+    parser: str = "html.parser" # html.parser, lxml or selectolax
+    cache_ttl: int = 900 # Seconds cached page is used without fetching it again
+    timeout: int = 30 # Seconds to wait for the store before search goes on without it
+    wait_timeout: int = 5 # Seconds hidden browser waits for product table
+    min_items: int = 1 # Fewest products in tables that may be a rendered page, with fewer products browser waits for network idle
+    network_idle: float = 0.5 # Seconds without finished network requests or new products that mean page is loaded
+    api: dict = None # API mode settings, see GetItems.get_items_api
+    pagination: dict = None # Pages after the first one, see GetItems.page_count
+    rate_limit: float = 2.0 # Requests per second to the store, None for no limit, see StorePolicy
+    burst: int = 5 # Requests sent at once before rate limit applies
+
+    def url(self, search_string):
+        """Search url of the store"""
+
+        return self.url_template.format(query=search_string.replace(" ", self.query_space))
+
+    def page_url(self, search_string, page):
+        """Url of the other result pages of the search"""
+
+        return self.pagination["url"].format(query=search_string.replace(" ", self.query_space), page=page)
+
+    def not_found(self):
+        """Product list with message shown when nothing was found"""
+
+        return [Product(f'{self.label}: The products you were looking for were not found in the store', 0.0, f"Search manually: {self.home_url}", self.name, time.time(), True)]
+
+
+# API mode: javascript stores are first read through plain HTTP, hidden browser is used only if that fails.
+# {"mode": "json-ld"} reads schema.org products embedded into the search page, JSON endpoint is called with:
+# {"mode": "json", "url": "https://store/api/search?q={query}", "items": "data.products",
+#  "fields": {"description": "name", "price": "price.amount", "link": "url"}, "price_scale": 1}
+JSON_LD = {"mode": "json-ld"}
+
+# Pagination: number of result pages is the biggest number among links matching "pages" selector on the first page,
+# pages 2..max_pages are built from "url" template with {query} and {page} and fetched up to "concurrency" at once:
+# {"url": "https://store/search/page/{page}/?q={query}", "pages": ".pagination a", "max_pages": 5, "concurrency": 3}
+
+STORES = (
+    StoreSpec(
+        name="HP store",
+        label="HP Store",
+        home_url="https://www.hpstore.lt/",
+        url_template="https://www.hpstore.lt/index.php?stoken=E6364813&force_sid=&lang=2&cl=search&searchparam={query}&button=",
+        engine="http",
+        container=".infogrid.products",
+        items="li",
+        description=FieldSpec(("a",), attr="title"),
+        link=FieldSpec(("a",), attr="href"),
+        price=FieldSpec(("big2",)),
+        price_normalizer=price_first_word,
+        parser="lxml",
+    ),
+    StoreSpec(
+        name="Nesiojami",
+        label="Nesiojami",
+        home_url="https://nesiojami.lt/",
+        url_template="https://nesiojami.lt/nesiojami-kompiuteriai-asus-acer-msi-lenovo-gigabyte/?orderby=price&s={query}",
+        engine="http",
+        container=".products.columns-4",
+        items="li",
+        description=FieldSpec(("h2.woocommerce-loop-product__title",)),
+        link=FieldSpec(("a",), attr="href"),
+        price=FieldSpec(("bdi",)),
+        price_normalizer=price_thousands_comma,
+        parser="lxml",
+        pagination={"url": "https://nesiojami.lt/nesiojami-kompiuteriai-asus-acer-msi-lenovo-gigabyte/page/{page}/?orderby=price&s={query}", "pages": ".woocommerce-pagination a.page-numbers", "max_pages": 5, "concurrency": 3},
+    ),
+    StoreSpec(
+        name="Kilobaitas",
+        label="Kilobaitas",
+        home_url="https://www.kilobaitas.lt/",
+        url_template="https://www.kilobaitas.lt/paieskos_rezultatai/searchresult.aspx?groupfilterid=34&q={query}",
+        engine="http",
+        container=".products-grid.row",
+        items="div.item-inner",
+        description=FieldSpec(("div.item-title.line-clamp p",)),
+        link=FieldSpec(("div.item-title.line-clamp a",), attr="href"),
+        price=FieldSpec(("div.item-price meta",), attr="content", index=1),
+        price_normalizer=float,
+        query_space="%20",
+        parser="selectolax",
+    ),
+    StoreSpec(
+        name="Skytech",
+        label="Skytech",
+        home_url="https://www.skytech.lt/",
+        url_template="https://www.skytech.lt/search.php?keywords={query}&x=14&y=14&search_in_description=0&pagesize=100&f=86_165",
+        engine="http",
+        container="table.productListing",
+        items=".productListing.odd, .productListing.even",
+        description=FieldSpec(("td.name a",)),
+        link=FieldSpec(("td.name a",), attr="href"),
+        price=FieldSpec(("td.name + td + td strong",)), # Price is in the second cell after the name
+        price_normalizer=price_plain,
+        not_found_text="prekių, atitinkančių",
+        parser="selectolax", # Up to 100 products per page
+    ),
+    StoreSpec(
+        name="Senukai",
+        label="Senukai Store",
+        home_url="https://www.senukai.lt/",
+        url_template="https://www.senukai.lt/paieska/?c3=Kompiuterin%C4%97+technika%2C+biuro+prek%C4%97s%2F%2FNe%C5%A1iojami+kompiuteriai+ir+priedai%2F%2FNe%C5%A1iojami+kompiuteriai&q={query}",
+        engine="api",
+        container=".ks-product-grid-row",
+        items=".sn-product-inner.sn-product-inner--hover.ks-gtm-categories",
+        description=FieldSpec((".ks-new-product-name",)),
+        link=FieldSpec((".ks-new-product-name",), attr="href"),
+        price=FieldSpec((".ks-new-product-price__price-number", ".ks-item-price span")), # Discount price first
+        price_normalizer=price_comma,
+        parser="selectolax",
+        cache_ttl=1800,
+        timeout=60,
+        min_items=12, # Grid renders in batches, page is read when no new rows come
+        api=JSON_LD,
+    ),
+    StoreSpec(
+        name="1a",
+        label="1a Store",
+        home_url="https://www.1a.lt/",
+        url_template="https://www.1a.lt/c/kompiuterine-technika-biuro-prekes/nesiojami-kompiuteriai-ir-priedai/nesiojami-kompiuteriai/371?f=u1Z3yjZbjam",
+        engine="api",
+        container=".catalog-taxons-products-container__grid-row",
+        items=".catalog-taxons-product__hover",
+        description=FieldSpec((".catalog-taxons-product__name",)),
+        link=FieldSpec((".catalog-taxons-product__name",), attr="href"),
+        price=FieldSpec((".catalog-taxons-product-price__item-price span",)),
+        price_normalizer=price_comma,
+        parser="selectolax",
+        cache_ttl=3600, # Fixed category url, does not depend on search string
+        timeout=60,
+        min_items=12,
+        api=JSON_LD,
+    ),
+    StoreSpec(
+        name="Varle",
+        label="Varle Store",
+        home_url="https://www.varle.lt/",
+        url_template="https://www.varle.lt/nesiojami-kompiuteriai/nesiojami-kompiuteriai/?cq={query}&f.s-gamintojas=HP&f.s-gamintojas=Lenovo&f.s-gamintojas=Dell",
+        engine="api",
+        container=".grid.three-in-row",
+        items=".GRID_ITEM",
+        description=FieldSpec((".product-title",), clean=clean_varle),
+        link=FieldSpec((".product-title a",), attr="href"),
+        price=FieldSpec((".price-value span",)),
+        price_normalizer=price_varle,
+        query_space="%20",
+        parser="selectolax",
+        cache_ttl=1800,
+        timeout=60,
+        min_items=12,
+        api=JSON_LD,
+    ),
+    StoreSpec(
+        name="RDE",
+        label="RDE Store",
+        home_url="https://www.rde.lt/",
+        url_template="https://www.rde.lt/categories/lt/150/sort/5/filter/0_0_219.142.191_1006757.1007229.1007307/page/1/Ne%C5%A1iojami-kompiuteriai.html",
+        engine="api",
+        container=".product-list",
+        items=".product__info",
+        description=FieldSpec((".product__title",)),
+        link=FieldSpec((".product__title a",), attr="href"),
+        price=FieldSpec((".price",)),
+        price_normalizer=price_plain,
+        multiple_containers=True,
+        parser="lxml",
+        cache_ttl=3600, # Fixed category url, does not depend on search string
+        timeout=60,
+        min_items=10,
+        api=JSON_LD,
+        pagination={"url": "https://www.rde.lt/categories/lt/150/sort/5/filter/0_0_219.142.191_1006757.1007229.1007307/page/{page}/Ne%C5%A1iojami-kompiuteriai.html", "pages": ".pagination a", "max_pages": 5, "concurrency": 3},
+    ),
+    StoreSpec(
+        name="Pigu",
+        label="Pigu Store",
+        home_url="https://pigu.lt/",
+        url_template="https://pigu.lt/lt/search?q={query}&c[50]=50&filter[attr_UHJla8SXcyDFvmVua2xhcw][2]=RGVsbA&filter[attr_UHJla8SXcyDFvmVua2xhcw][4]=TGVub3Zv&filter[attr_UHJla8SXcyDFvmVua2xhcw][5]=SFA",
+        engine="api",
+        container=".product-list.all-products-visible",
+        items=".product-item-inner-hover",
+        description=FieldSpec(("p.product-name > a",), attr="title"),
+        link=FieldSpec(("p.product-name > a",), attr="href"),
+        price=FieldSpec((".price",)), # Products without price are skipped
+        price_normalizer=price_cents,
+        query_space="%20",
+        parser="selectolax",
+        cache_ttl=1800,
+        timeout=60,
+        min_items=12,
+        api=JSON_LD,
+    ),
+)
+
+######################################
+# Timing and metrics of every search #
+######################################
+
+class ScrapeMetrics():
+    """Records wall time of every phase, bytes, items and errors per store per search and exports them"""
+
+    def __init__(self, directory="metrics"):
+
+        # Metrics files: one JSON line per store per search and Prometheus text file with the latest values
+        self.jsonl_path = os.path.join(directory, "scraping_metrics.jsonl")
+        self.prometheus_path = os.path.join(directory, "scraping_metrics.prom")
+        os.makedirs(directory, exist_ok=True)
+
+        self.local = local() # Record of the store scraped by current worker thread
+        self.lock = Lock()
+        self.searches_total = 0
+        self.errors_total = {} # Store name: errors since app start
+        self.latest = {} # Store name: record of the last search
+
+    @contextmanager
+    def store(self, search_string, store_name):
+        """Collect metrics of one store scraped by the current thread"""
+
+        record = {"time": round(time.time(), 3), "search": search_string, "store": store_name, "seconds": 0.0, "phases": {}, "bytes": 0, "items": 0, "errors": [], "unreachable": False}
+        self.local.record = record
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self.local.record = None
+
+    @contextmanager
+    def attach(self, record):
+        """Add metrics of the current thread to record of a store, used by threads fetching its other pages"""
+
+        self.local.record = record
+        try:
+            yield
+        finally:
+            self.local.record = None
+
+    def current(self):
+        """Record of the store scraped by the current thread"""
+
+        return getattr(self.local, "record", None)
+
+    @contextmanager
+    def phase(self, name):
+        """Measure wall time of a phase (download, page_load, parse...) of the current store"""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start)
+
+    def add_phase(self, name, seconds):
+        """Add measured seconds to a phase of the current store"""
+
+        record = self.current()
+        if record is not None:
+            with self.lock: # Pages of one store may be fetched by several threads
+                record["phases"][name] = record["phases"].get(name, 0.0) + seconds
+
+    def add_bytes(self, quantity):
+        """Count bytes downloaded for the current store"""
+
+        record = self.current()
+        if record is not None:
+            with self.lock:
+                record["bytes"] += quantity
+
+    def reachable(self, reached):
+        """Remember if the last page load reached the current store"""
+
+        record = self.current()
+        if record is not None:
+            record["unreachable"] = not reached
+
+    def error(self, message):
+        """Remember error of the current store"""
+
+        record = self.current()
+        if record is not None:
+            with self.lock:
+                record["errors"].append(message)
+
+    def finish_search(self, records):
+        """Export records of one search and return summary lines for log area"""
+
+        with self.lock:
+            self.searches_total += 1
+            for record in records:
+                self.latest[record["store"]] = record
+                self.errors_total[record["store"]] = self.errors_total.get(record["store"], 0) + len(record["errors"])
+            try:
+                with open(self.jsonl_path, "a", encoding="utf-8") as file:
+                    for record in records:
+                        file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.write_prometheus()
+            except OSError:
+                pass # Metrics must never break scraping
+
+        summary = ["Timing by store:"]
+        for record in sorted(records, key=lambda record: record["seconds"], reverse=True):
+            phases = " ".join(f"{name} {seconds:.2f}" for name, seconds in record["phases"].items())
+            errors = f" | {len(record['errors'])} errors" if record["errors"] else ""
+            summary.append(f"{record['store']}: {record['seconds']:.2f} s | {phases} | {record['bytes'] / 1024:.0f} KB | {record['items']} items{errors}")
+        return summary
+
+    def write_prometheus(self):
+        """Rewrite Prometheus text file with the latest values of every store"""
+
+        lines = [
+            "# HELP scraping_searches_total Searches finished since app start.",
+            "# TYPE scraping_searches_total counter",
+            f"scraping_searches_total {self.searches_total}",
+            "# HELP scraping_store_seconds Wall time of the store in the last search.",
+            "# TYPE scraping_store_seconds gauge",
+        ]
+        lines += [f'scraping_store_seconds{{store="{store}"}} {record["seconds"]:.6f}' for store, record in self.latest.items()]
+        lines += ["# HELP scraping_phase_seconds Wall time of scraping phase in the last search.", "# TYPE scraping_phase_seconds gauge"]
+        lines += [f'scraping_phase_seconds{{store="{store}",phase="{phase}"}} {seconds:.6f}' for store, record in self.latest.items() for phase, seconds in record["phases"].items()]
+        lines += ["# HELP scraping_bytes Bytes downloaded in the last search.", "# TYPE scraping_bytes gauge"]
+        lines += [f'scraping_bytes{{store="{store}"}} {record["bytes"]}' for store, record in self.latest.items()]
+        lines += ["# HELP scraping_items Products found in the last search.", "# TYPE scraping_items gauge"]
+        lines += [f'scraping_items{{store="{store}"}} {record["items"]}' for store, record in self.latest.items()]
+        lines += ["# HELP scraping_errors_total Errors since app start.", "# TYPE scraping_errors_total counter"]
+        lines += [f'scraping_errors_total{{store="{store}"}} {errors}' for store, errors in self.errors_total.items()]
+        with open(self.prometheus_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+############################################
+# Filtering of products found in one sweep #
+############################################
+
+class ProductFilter():
+    """Brand, known mistakes, duplicates and price range filters of one search applied to columns of products"""
+
+    # Descriptions with these words are known wrong matches
+    mistakes = ("rtx3050", "rtx3060", "16gb", "512 gb", "512ssd", "dos")
+
+    # Price range of price filter in euros
+    min_price = 1800
+    max_price = 2400
+
+    def __init__(self, search_string, filter_status):
+
+        # Brand named in search string, empty string keeps products of all brands
+        search_string = search_string.lower()
+        self.brand = next((brand_name for brand_name in BRANDS if brand_name in search_string), "")
+        self.filter_status = filter_status
+        self.links = set() # Links of products kept, the same product is kept once per search
+        self.counts = {"total": 0, "brand": 0, "mistakes": 0, "duplicates": 0, "price": 0} # Products left after every filter
+
+    def apply(self, product_list):
+        """Products that pass all filters, in the order they were given, counts add up over calls"""
+
+        # Description column is lower cased once, filters narrow down list of row numbers
+        descriptions = [item.description.lower() for item in product_list]
+        self.counts["total"] += len(product_list)
+        rows = range(len(product_list)) if not self.brand else [row for row, description in enumerate(descriptions) if self.brand in description]
+        self.counts["brand"] += len(rows)
+
+        # Plain substring checks of remaining rows are faster than one alternation regex in Python
+        for mistake in self.mistakes:
+            rows = [row for row in rows if mistake not in descriptions[row]]
+        self.counts["mistakes"] += len(rows)
+
+        links = self.links
+        rows = [row for row in rows if not (product_list[row].link in links or links.add(product_list[row].link))]
+        self.counts["duplicates"] += len(rows)
+
+        if self.filter_status:
+            min_price, max_price = self.min_price, self.max_price
+            rows = [row for row in rows if min_price <= product_list[row].price <= max_price]
+        self.counts["price"] += len(rows)
+        return [product_list[row] for row in rows]
+
+#########################################
+# Matching the same product from stores #
+#########################################
+
+class ProductMatcher():
+    """Groups listings of the same laptop from different stores with an index of title tokens and union-find"""
+
+    # Parts of normalized title: processor, graphics card, memory, storage and model numbers
+    cpu_pattern = re.compile(r"\b(?:(i[3579])-?(\d{4,5}[a-z]{0,2})|ryzen ?([3579]) ?(\d{4}[a-z]{0,2})|ultra ?([579]) ?(\d{3}[a-z]?))\b")
+    gpu_pattern = re.compile(r"\b(rtx|gtx|rx) ?(\d{4})( ?ti| ?super)?\b")
+    memory_pattern = re.compile(r"\b(\d{1,4})(gb|tb)\b( ?(?:ssd|nvme|m\.2|pcie))?")
+    model_pattern = re.compile(r"\b(?=[a-z0-9-]*\d)(?=[a-z0-9-]*[a-z])[a-z0-9][a-z0-9-]{5,}\b")
+    not_model_pattern = re.compile(r"^(?:win\d+\w*|windows\d+\w*|w\d+\w*|\d+hz|\d+x\d+|\d+(?:gb|tb|mhz|ghz|w|wh)|ddr\d.*|gen\d+|wi-?fi\d*|usb.*|rtx\d+.*|gtx\d+.*)$")
+
+    screen_pattern = re.compile(r"^1[3-8](?:\.\d)?$") # Screen size in inches
+
+    # Words of title that say nothing about the product
+    filler_words = {"nešiojamas", "nešiojamasis", "kompiuteris", "laptop", "notebook", "gaming", "žaidimų", "with", "su", "and", "ir"}
+    spec_words = {"ryzen", "ultra", "intel", "amd", "core", "rtx", "gtx", "rx", "nvidia", "geforce"}
+    ram_sizes = {"4", "8", "12", "16", "24", "32", "48", "64", "96", "128"}
+
+    def __init__(self):
+
+        self.parent = [] # Union-find over listing numbers
+        self.listings = [] # Listing number: product
+        self.members = {} # Group root: listing numbers of the group
+        self.index = {} # Token of title: listing numbers with that token
+        self.specs = {} # Group root: processor, graphics card, memory and storage known for the group
+
+    def normalize(self, title):
+        """Lower case title with units written the same way: '32 GB' -> '32gb', 'i7 13700H' -> 'i7-13700h'"""
+
+        title = re.sub(r"(\d),(\d)", r"\1.\2", title.lower()) # Decimal comma: 15,6 -> 15.6
+        title = re.sub(r"[|/()\[\]\"'+;,]", " ", title)
+        title = re.sub(r"(\d)\s+(gb|tb)\b", r"\1\2", title)
+        title = re.sub(r"\b(i[3579])\s+(\d{4,5})", r"\1-\2", title)
+        return " ".join(title.split())
+
+    def tokens(self, title):
+        """Keys of the index for one title (model numbers and specification of the laptop) and specification parts found"""
+
+        title = self.normalize(title)
+        cpu_match = self.cpu_pattern.search(title)
+        gpu_match = self.gpu_pattern.search(title)
+        cpu = None
+        if cpu_match:
+            family, number = next((cpu_match.group(i), cpu_match.group(i + 1)) for i in (1, 3, 5) if cpu_match.group(i))
+            cpu = f"{family if family.startswith('i') else ('r' if cpu_match.group(3) else 'u') + family}-{number}"
+        gpu = "".join(part.strip() for part in gpu_match.groups() if part) if gpu_match else None
+
+        # Memory written before storage, storage is in terabytes or followed by 'ssd'
+        ram = ssd = None
+        for number, unit, storage in self.memory_pattern.findall(title):
+            if unit == "gb" and not storage and number in self.ram_sizes and ram is None:
+                ram = number + unit
+            elif (unit == "tb" or storage) and ssd is None:
+                ssd = number + unit
+
+        # Model numbers are looked for in title without processor and graphics card names
+        keys = set()
+        rest = title
+        for match in (cpu_match, gpu_match):
+            if match:
+                rest = rest.replace(match.group(0), " ")
+        for word in self.model_pattern.findall(rest):
+            if not self.not_model_pattern.match(word):
+                keys.add(f"model:{word}")
+
+        # Brand and series words (Victus, Legion 5 Pro) before the first part of specification
+        words = title.split()
+        brand = next((word for word in words if word in BRANDS), None)
+        if brand and cpu and gpu and ram and ssd:
+            series = []
+            size = None
+            for word in words[words.index(brand) + 1:]:
+                if f"model:{word}" in keys or word in self.spec_words or self.memory_pattern.match(word) or self.cpu_pattern.match(word):
+                    break
+                if self.screen_pattern.match(word): # Omen 16 and Omen 17 are different laptops
+                    size = size or word.split(".")[0]
+                elif word not in self.filler_words:
+                    series.append(word)
+            keys.add(f"spec:{brand}|{' '.join(sorted(series[:3]))}|{size}|{cpu}|{gpu}|{ram}|{ssd}")
+        return keys, {"cpu": cpu, "gpu": gpu, "ram": ram, "ssd": ssd}
+
+    def conflict(self, spec, other_spec):
+        """True if groups have different known processor, graphics card, memory or storage"""
+
+        return any(spec[part] and other_spec[part] and spec[part] != other_spec[part] for part in spec)
+
+    def find(self, number):
+        """Root listing number of the group"""
+
+        parent = self.parent
+        while parent[number] != number:
+            parent[number] = parent[parent[number]]
+            number = parent[number]
+        return number
+
+    def add(self, item):
+        """Add listing, returns root of its group and roots of groups that existed before and are now part of it"""
+
+        number = len(self.listings)
+        self.listings.append(item)
+        self.parent.append(number)
+        self.members[number] = [number]
+        root = number
+        previous = set()
+        keys, self.specs[number] = self.tokens(item.description)
+        for key in keys:
+            listings = self.index.setdefault(key, [])
+            # Model code is shared by configurations of one family (Legion 16IRX9 with i5 or i7), they are joined only
+            # if processor, graphics card, memory and storage do not differ
+            for other_root in {self.find(other) for other in listings}:
+                if other_root == root or self.conflict(self.specs[root], self.specs[other_root]):
+                    continue
+                previous.add(other_root)
+                # Smaller group is joined to the bigger one
+                if len(self.members[other_root]) < len(self.members[root]):
+                    other_root, root = root, other_root
+                self.parent[root] = other_root
+                self.members[other_root].extend(self.members.pop(root))
+                spec = self.specs.pop(root)
+                self.specs[other_root] = {part: self.specs[other_root][part] or spec[part] for part in spec}
+                root = other_root
+            listings.append(number)
+        return root, previous
+
+    def offers(self, root):
+        """Products of the group, cheapest first"""
+
+        return sorted((self.listings[number] for number in self.members[root]), key=lambda i: i.price)
+
+    def group(self, product_list):
+        """Product with the best price and number of offers of every group, cheapest first"""
+
+        roots = [self.add(item)[0] for item in product_list]
+        groups = []
+        for root in {self.find(root) for root in roots}:
+            offers = self.offers(root)
+            groups.append((offers[0], len(offers)))
+        return sorted(groups, key=lambda group: group[0].price)
+
+###############################################################
+# Products extraction from store pages, also in other process #
+###############################################################
+
+class PageExtractor():
+    """Parses store pages and extracts products with selectors of the store, used by GetItems and by worker processes"""
+
+    def __init__(self):
+
+        # One parser for every backend, missing optional backends fall back to slower ones
+        self.parsers = {backend: HtmlParser(backend) for backend in HtmlParser.backends}
+
+    def extract(self, store, html, old_content_hash=None, incremental=True):
+        """Parse page and extract products, returns products (None if tables did not change), result pages, content hash, phase seconds and errors"""
+
+        phases = {}
+        errors = []
+        start = time.perf_counter()
+        doc = self.parsers[store.parser].parse(html)
+        tables = self.get_tables(store, doc)
+        pages = self.page_count(store, doc)
+        phases["parse"] = time.perf_counter() - start
+
+        # Page changed only outside of product tables (banners, tokens, recommendations)
+        content_hash = None
+        if incremental:
+            start = time.perf_counter()
+            content_hash = self.fingerprint("".join(table.html() for table in tables))
+            phases["fingerprint"] = time.perf_counter() - start
+            if old_content_hash == content_hash:
+                return None, pages, content_hash, phases, errors
+        start = time.perf_counter()
+        product_list = self.get_items(store, doc, tables, errors)
+        phases["extract"] = time.perf_counter() - start
+        return product_list, pages, content_hash, phases, errors
+
+    def page_count(self, store, doc):
+        """Number of result pages from pagination links of the page, capped by max_pages of the store"""
+
+        if not store.pagination:
+            return 1
+        numbers = [int(node.text().strip()) for node in doc.select(store.pagination["pages"]) if node.text().strip().isdigit()]
+        return min(max(numbers, default=1), store.pagination.get("max_pages", 5))
+
+    def fingerprint(self, content):
+        """Hash of page or product tables content"""
+
+        return hashlib.sha1(content.encode("utf-8") if isinstance(content, str) else content).hexdigest()
+
+    def get_tables(self, store, doc):
+        """Product tables of parsed page found with container selector of the store"""
+
+        tables = doc.select(store.container) if store.multiple_containers else [doc.select_one(store.container)]
+        return [table for table in tables if table is not None]
+
+    def get_items(self, store, doc, tables=None, errors=None):
+        """Extract products from parsed page with selectors of the store, problems with single products are added to errors"""
+
+        if tables is None:
+            tables = self.get_tables(store, doc)
+        #print(tables[0].html()) # Left in case revision is required
+        if not tables or (store.not_found_text and store.not_found_text in tables[0].html()):
+            return store.not_found()
+        items = [item for table in tables for item in table.select(store.items)]
+        if len(items) < 1:
+            return store.not_found()
+        now = time.time()
+        product_list = []
+        unreadable_prices = []
+        for item in items:
+            description = store.description.value(item)
+            link = store.link.value(item)
+            price = store.price.value(item)
+            if description is None or link is None or price is None: # Incomplete product, e.g. Pigu item without price
+                continue
+            try:
+                price = float(store.price_normalizer(price))
+            except ValueError: # Price like 'Kaina teirautis' (price on request)
+                unreadable_prices.append(price)
+                continue
+            product_list.append(Product(description, price, urljoin(store.home_url, link), store.name, now))
+        if unreadable_prices and errors is not None:
+            errors.append(f"{len(unreadable_prices)} products skipped, price not readable: {unreadable_prices[0][:30]!r}")
+        return product_list
+
+
+# Extractor of the worker process, created by its first page
+process_extractor = None
+
+def extract_in_process(store, html, old_content_hash=None, incremental=True):
+    """Run PageExtractor.extract in worker process, products are sent back as compact tuples"""
+
+    global process_extractor
+    if process_extractor is None:
+        process_extractor = PageExtractor()
+    product_list, pages, content_hash, phases, errors = process_extractor.extract(store, html, old_content_hash, incremental)
+    rows = None if product_list is None else [astuple(item) for item in product_list]
+    return rows, pages, content_hash, phases, errors
+
 #####################################
 # Scraping web pages of nine stores #
 #####################################
@@ -269,373 +1943,516 @@ class ShowResults(tk.Toplevel):
 class GetItems():
     """Getting web page scraping results - product list"""
 
-    def __init__(self, app_class_instance, log_area_class_instance):
-        
+    # Seconds API mode of a store is skipped after it failed
+    api_retry_after = 3600
+
+    def __init__(self, app_class_instance, log_area_class_instance, max_workers=9, max_browsers=5, browser_idle_timeout=300, lightweight_browsers=True, cache_dir="cache", cache_max_size_mb=100, stores=STORES, metrics_dir="metrics", history_dir="history", incremental=True, processes=0):
+
         # Inherit from other classes
         self.app = app_class_instance
         self.log_area = log_area_class_instance
 
-    def quantity_items_to_log(self, quantity):
+        # bs4, requests and selenium, if not yet imported in background
+        load_scraping_libraries()
+
+        # Stores scraped in every search, see STORES registry
+        self.stores = list(stores)
+
+        # Number of stores scraped at the same time (one worker thread per store)
+        self.max_workers = max_workers
+        self.engine = ScrapeEngine(max_workers=max_workers)
+
+        # Timing, bytes, items and errors of every store, shown in log area and exported to metrics_dir
+        self.metrics = ScrapeMetrics(metrics_dir)
+
+        # Pages of recent searches are served from disk without network or browser
+        self.cache = PageCache(os.path.join(cache_dir, "pages.sqlite3"), max_size_mb=cache_max_size_mb)
+
+        # Stores whose page or product tables did not change since last search reuse products stored in cache
+        self.incremental = incremental
+
+        # Every product found is written with its price, see cheapest_in_range and price_drops of PriceHistory
+        self.history = PriceHistory(os.path.join(history_dir, "prices.sqlite3"))
+
+        # Javascript stores read through plain HTTP when they expose products without browser
+        self.api_disabled_until = {}
+
+        # Rate limit, learned timeouts and circuit breaker of every store
+        self.policies = {store.name: StorePolicy(store.rate_limit, store.burst) for store in self.stores}
+
+        # Concurrent searches asking for the same store page (fixed category urls, shared presets) load it once
+        self.single_flight = SingleFlight()
+
+        # Parsers of all backends and product extraction with selectors of the store
+        self.extractor = PageExtractor()
+
+        # Pages are parsed and extracted by worker processes on all cores instead of scrape threads sharing one core,
+        # workers are started fresh (spawn) because forking a process with running threads can deadlock
+        self.process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) if processes else None
+
+        # Pooled HTTP connections shared by stores without javascript across searches
+        self.http = HttpClient(pool_maxsize=max_workers)
+
+        # Warm hidden Chrome browsers shared by Selenium stores across searches
+        self.driver_pool = DriverPool(max_size=max_browsers, idle_timeout=browser_idle_timeout, lightweight=lightweight_browsers)
+
+    def close(self):
+        """Close hidden browsers and HTTP connections when the app exits"""
+
+        self.engine.close()
+        if self.process_pool:
+            self.process_pool.shutdown(cancel_futures=True)
+        self.driver_pool.close()
+        self.http.close()
+        self.cache.close()
+        self.history.close()
+
+    def quantity_items_to_log(self, store_name, quantity):
         """Function to send messages to log area"""
 
-        self.app.queue.put(f"                    Items found: {quantity}")
+        self.app.queue.put(f"                    {store_name} items found: {quantity}")
 
-    def get_product_list(self, search_string, filter_status):
-        """Function for managing requests and get final product list"""
+    def get_product_list(self, search_string, filter_status, on_store_done=None):
+        """Function for managing requests and get final product list, on_store_done gets filtered products of every store as soon as it is scraped"""
 
 
 ######## Manage requests and get product lists ########
 
-        # Store: HP store
-        self.app.queue.put("Scraping HP store...")
-        adapted_search_string = search_string.replace(" ", "+")
-        url_hpstore = f"https://www.hpstore.lt/index.php?stoken=E6364813&force_sid=&lang=2&cl=search&searchparam={adapted_search_string}&button="
-        self.doc_hpstore = self.get_pages(url_hpstore)
-        self.items_hpstore = self.get_items_hpstore(self.doc_hpstore)
-        self.quantity_items_to_log(len(self.items_hpstore))
-
-        # Store: Nesiojami
-        self.app.queue.put("Scraping Nesiojami...")
-        adapted_search_string = search_string.replace(" ", "+")
-        url_nesiojami = f"https://nesiojami.lt/nesiojami-kompiuteriai-asus-acer-msi-lenovo-gigabyte/?orderby=price&s={adapted_search_string}"
-        self.doc_nesiojami = self.get_pages(url_nesiojami)
-        self.items_nesiojami = self.get_items_nesiojami(self.doc_nesiojami)
-        self.quantity_items_to_log(len(self.items_nesiojami))
-
-        # Store: Kilobaitas
-        self.app.queue.put("Scraping Kilobaitas...")
-        adapted_search_string = search_string.replace(" ", "%20")
-        url_kilobaitas = f"https://www.kilobaitas.lt/paieskos_rezultatai/searchresult.aspx?groupfilterid=34&q={adapted_search_string}"
-        self.doc_kilobaitas = self.get_pages(url_kilobaitas)
-        self.items_kilobaitas = self.get_items_kilobaitas(self.doc_kilobaitas)
-        self.quantity_items_to_log(len(self.items_kilobaitas))
-
-        # Store: Skytech
-        self.app.queue.put("Scraping Skytech...")
-        adapted_search_string = search_string.replace(" ", "+")
-        url_skytech = f"https://www.skytech.lt/search.php?keywords={adapted_search_string}&x=14&y=14&search_in_description=0&pagesize=100&f=86_165"
-        self.doc_skytech = self.get_pages(url_skytech)
-        self.items_skytech = self.get_items_skytech(self.doc_skytech)
-        self.quantity_items_to_log(len(self.items_skytech))
-
-        # Store: Senukai
-        self.app.queue.put("Scraping Senukai. Hidden browser will open and close. Please wait...")
-        adapted_search_string = search_string.replace(" ", "+")
-        url_senukai = f"https://www.senukai.lt/paieska/?c3=Kompiuterin%C4%97+technika%2C+biuro+prek%C4%97s%2F%2FNe%C5%A1iojami+kompiuteriai+ir+priedai%2F%2FNe%C5%A1iojami+kompiuteriai&q={adapted_search_string}"
-        self.script_senukai = ".ks-product-grid-row"
-        self.doc_senukai = self.get_pages_java_script(url_senukai, self.script_senukai)
-        if not self.doc_senukai:
-            self.items_senukai = []
-        else:
-            self.items_senukai = self.get_items_senukai(self.doc_senukai)
-        self.driver.quit() # Closes Chrome browser opened by Selenium webdriver
-        self.quantity_items_to_log(len(self.items_senukai))
-
-        # Store: 1a.lt
-        self.app.queue.put("Scraping 1a. Hidden browser will open and close. Please wait...")
-        url_1a = "https://www.1a.lt/c/kompiuterine-technika-biuro-prekes/nesiojami-kompiuteriai-ir-priedai/nesiojami-kompiuteriai/371?f=u1Z3yjZbjam"
-        self.script_1a = ".catalog-taxons-products-container__grid-row"
-        self.doc_1a = self.get_pages_java_script(url_1a, self.script_1a)
-        if not self.doc_1a:
-            self.items_1a = []
-        else:
-            self.items_1a = self.get_items_1a(self.doc_1a)
-        self.driver.quit() # Closes Chrome browser opened by Selenium webdriver
-        self.quantity_items_to_log(len(self.items_1a))
-
-        # Store: Varle
-        self.app.queue.put("Scraping Varle. Hidden browser will open and close. Please wait...")
-        adapted_search_string = search_string.replace(" ", "%20")
-        url_varle = f"https://www.varle.lt/nesiojami-kompiuteriai/nesiojami-kompiuteriai/?cq={adapted_search_string}&f.s-gamintojas=HP&f.s-gamintojas=Lenovo&f.s-gamintojas=Dell"
-        self.script_varle = ".grid.three-in-row"
-        self.doc_varle = self.get_pages_java_script(url_varle, self.script_varle)
-        if not self.doc_varle:
-            self.items_varle = []
-        else:
-            self.items_varle = self.get_items_varle(self.doc_varle)
-        self.driver.quit() # Closes Chrome browser opened by Selenium webdriver
-        self.quantity_items_to_log(len(self.items_varle))
-
-        # Store: RDE.lt
-        self.app.queue.put("Scraping RDE. Hidden browser will open and close. Please wait...")
-        url_rde = "https://www.rde.lt/categories/lt/150/sort/5/filter/0_0_219.142.191_1006757.1007229.1007307/page/1/Ne%C5%A1iojami-kompiuteriai.html"
-        self.script_rde = ".product-list"
-        self.doc_rde = self.get_pages_java_script(url_rde, self.script_rde, find_multiple=True)
-        if not self.doc_rde:
-            self.items_rde = []
-        else:
-            self.items_rde = self.get_items_rde(self.doc_rde)
-        self.driver.quit() # Closes Chrome browser opened by Selenium webdriver
-        self.quantity_items_to_log(len(self.items_rde))
-
-        # Store: Pigu
-        self.app.queue.put("Scraping Pigu. Hidden browser will open and close. Please wait...")
-        adapted_search_string = search_string.replace(" ", "%20")
-        url_pigu = f"https://pigu.lt/lt/search?q={adapted_search_string}&c[50]=50&filter[attr_UHJla8SXcyDFvmVua2xhcw][2]=RGVsbA&filter[attr_UHJla8SXcyDFvmVua2xhcw][4]=TGVub3Zv&filter[attr_UHJla8SXcyDFvmVua2xhcw][5]=SFA"
-        self.script_pigu = ".product-list.all-products-visible"
-        self.doc_pigu = self.get_pages_java_script(url_pigu, self.script_pigu, find_multiple=False)
-        if not self.doc_pigu:
-            self.items_pigu = []
-        else:
-            self.items_pigu = self.get_items_pigu(self.doc_pigu)
-        self.driver.quit() # Closes Chrome browser opened by Selenium webdriver
-        self.quantity_items_to_log(len(self.items_pigu))
+        # Scrape all stores concurrently on the asyncio engine, HTTP and Selenium stores alike
+        self.app.queue.put("Scraping stores. Please wait...")
+
+        # Every store is filtered and sorted once, as soon as it is scraped (callbacks run one at a time on engine loop)
+        product_filter = ProductFilter(search_string, filter_status)
+        filtered_lists = {}
+
+        def store_done(store_name, items):
+            filtered_lists[store_name] = sorted(product_filter.apply(items), key=lambda i: i.price)
+            if on_store_done:
+                on_store_done(store_name, filtered_lists[store_name])
+
+        records = [] # Metrics of every store of this search
+        jobs = [(store.name, partial(self.scrape_store, store, search_string, records), store.timeout) for store in self.stores]
+        product_lists = self.engine.run(jobs, store_done)
+        for store in self.stores:
+            if product_lists[store.name] is None:
+                self.app.queue.put(f"{store.name}: no answer in {store.timeout} seconds, store skipped")
+                self.store_failed(store)
+                records.append({"time": round(time.time(), 3), "search": search_string, "store": store.name, "seconds": float(store.timeout), "phases": {}, "bytes": 0, "items": 0, "errors": ["timeout"], "unreachable": True})
+                product_lists[store.name] = []
+        for line in self.metrics.finish_search(list(records)):
+            self.app.queue.put(line)
+
+        # Save prices of all products found, before filters, in one transaction
+        self.history.record(search_string, [item for store in self.stores for item in product_lists[store.name]])
+        price_drops = self.history.price_drops(search_string)
+        if price_drops:
+            self.app.queue.put(f"Price drops since last search: {len(price_drops)}")
+            for item in price_drops[:5]:
+                self.app.queue.put(f"                    {item['Store']}: {item['Old price']} → {item['Price']} {item['Description']}")
 
 
 ######## Consolidate and filter product list ########
 
         self.app.queue.put("Scraping finished. Creating list of products found...")
 
-        # Create the list of all products found
-        self.product_list_total_interim = self.items_hpstore + self.items_nesiojami + self.items_kilobaitas + self.items_skytech + self.items_senukai + self.items_1a + self.items_varle + self.items_rde + self.items_pigu
-        self.app.queue.put(f"Total items found: {len(self.product_list_total_interim)}")
-        
-        # Filter search result by brand name
-        if len(self.product_list_total_interim) >= 1:
-            brand_names_all = ["hp", "lenovo", "dell", "acer", "asus", "gigabyte", "msi", "razer"]
-            for brand_name in brand_names_all:
-                if brand_name in search_string.lower():
-                    search_string_total = brand_name
-                    break
-                else:
-                    search_string_total = ""
-            self.product_list_total = [item for item in self.product_list_total_interim if search_string_total in item["Description"].lower()]          
-            self.app.queue.put(f"Items after brand filter: {len(self.product_list_total)}")
-            
-            # Filtering second time for some known mistakes
-            filter_string_all = ["rtx3050", "rtx3060", "16gb", "512 gb", "512ssd", "dos"]
-            for filter_string in filter_string_all:
-                self.product_list_total = [item for item in self.product_list_total if filter_string not in item["Description"].lower()]
-            self.app.queue.put(f"Items after known mistakes filter: {len(self.product_list_total)}")
-        else:
-            self.product_list_total = self.product_list_total_interim
-        
-        # Sorting the list by price
-        self.sorted_list_by_price = sorted(self.product_list_total, key=lambda i: i['Price'])
-        
-        # Apply price filter 1800-2400 euros
+        # Products of stores were filtered by brand name, known mistakes, duplicates and price range 1800-2400 euros
+        # when every store finished, counts of all stores are shown
+        counts = product_filter.counts
+        self.app.queue.put(f"Total items found: {counts['total']}")
+        if counts["total"]:
+            self.app.queue.put(f"Items after brand filter: {counts['brand']}")
+            self.app.queue.put(f"Items after known mistakes filter: {counts['mistakes']}")
+            if counts["duplicates"] != counts["mistakes"]:
+                self.app.queue.put(f"Items after duplicates filter: {counts['duplicates']}")
+
+        # Merge lists of stores already sorted by price, equal prices keep the order of stores
+        sorted_list_by_price = list(heapq.merge(*(filtered_lists.get(store.name, []) for store in self.stores), key=lambda i: i.price))
         if filter_status:
-            filtered_list = []
-            for i in range(len(self.sorted_list_by_price)):
-                if not (self.sorted_list_by_price[i]["Price"] < 1800 or self.sorted_list_by_price[i]["Price"] > 2400):
-                    filtered_list.append(self.sorted_list_by_price[i])
-            self.sorted_list_by_price = filtered_list
-            self.app.queue.put(f"Items after price filter: {len(self.sorted_list_by_price)}\n\n")
-        return self.sorted_list_by_price
+            self.app.queue.put(f"Items after price filter: {len(sorted_list_by_price)}\n\n")
+        return sorted_list_by_price
+
+    def store_failed(self, store):
+        """Count failure of the store, report when it is going to be skipped"""
+
+        policy = self.policies[store.name]
+        if policy.failure():
+            self.app.queue.put(f"{store.name}: {policy.failures} failures in a row, store is skipped for {policy.cooldown} s")
+
+    def scrape_store(self, store, search_string, records, abandoned=None):
+        """Scrape one store in a worker thread, report items found and add its metrics to records unless search stopped waiting for it"""
+
+        policy = self.policies[store.name]
+        if not policy.allow():
+            # Store failed several times in a row, search goes on without waiting for it
+            self.app.queue.put(f"{store.name}: skipped for {policy.cooldown_left():.0f} s more after {policy.failures} failures in a row")
+            return []
+        self.app.queue.put(f"Scraping {store.name}...")
+        with self.metrics.store(search_string, store.name) as record:
+            try:
+                items = self.scrape(store, search_string)
+            except Exception as e:
+                # One broken store must not stop the other stores scraped in parallel
+                self.app.queue.put(f"{store.name}: an error occurred: {str(e)}")
+                self.metrics.error(str(e))
+                items = []
+            record["items"] = len(items)
+        if abandoned is not None and abandoned.is_set(): # Search timed out and went on without this store
+            return []
+
+        # One outcome per search: store failed if it could not be reached (timeouts are counted by get_product_list),
+        # empty search results and errors of parsing or extraction do not mean the store is down
+        if not items and record["unreachable"]:
+            self.store_failed(store)
+        else:
+            policy.success()
+        records.append(record)
+        self.quantity_items_to_log(store.name, len(items))
+        return items
+
+######## Scrape any store described in the registry ########
+
+    def scrape(self, store, search_string):
+        """Fetch first search page of the store, then its other result pages at once, and merge products"""
+
+        product_list, pages = self.scrape_page(store, store.url(search_string), search_string)
+        if pages <= 1:
+            return product_list
+
+        # Other pages are fetched by up to "concurrency" threads sharing metrics record of the store
+        record = self.metrics.current()
+        def scrape_other_page(page):
+            with self.metrics.attach(record):
+                return self.scrape_page(store, store.page_url(search_string, page), search_string, page)[0]
+        with ThreadPoolExecutor(max_workers=store.pagination.get("concurrency", 3)) as executor:
+            page_lists = list(executor.map(scrape_other_page, range(2, pages + 1)))
+
+        # Product moved to the next page while pages were fetched is kept once
+        links = {item.link for item in product_list}
+        for page_list in page_lists:
+            for item in page_list:
+                if item.link not in links:
+                    links.add(item.link)
+                    product_list.append(item)
+        self.app.queue.put(f"{store.name}: {pages} result pages scraped")
+        return product_list
+
+    def scrape_page(self, store, url, search_string, page=1):
+        """Fetch one result page with engine of the store and extract products, returns products and number of result pages"""
+
+        # API url may hold the search even if page url of the store does not
+        key = (store.name, url, search_string if store.api and "url" in store.api else None)
+        start = time.perf_counter()
+        (product_list, pages), shared = self.single_flight.do(key, partial(self.load_page, store, url, search_string, page))
+        if shared:
+            self.metrics.add_phase("shared", time.perf_counter() - start)
+        # Every search gets its own list, first page list is extended with products of other pages
+        return list(product_list), pages
+
+    def load_page(self, store, url, search_string, page=1):
+        """Fetch and extract one result page, called once for all concurrent searches asking for it"""
+
+        if store.engine == "api":
+            result = self.get_items_api(store, url, search_string, page)
+            if result is not None:
+                return result
+        pagination_selector = store.pagination["pages"] if store.pagination else None
+        if store.engine == "http":
+            html = self.get_pages(url, ttl=store.cache_ttl, store=store)
+        else:
+            html = self.get_pages_java_script(url, store.container, find_multiple=store.multiple_containers, ttl=store.cache_ttl, wait_timeout=store.wait_timeout, pagination_selector=pagination_selector, items_selector=store.items, min_items=store.min_items, network_idle=store.network_idle, store=store)
+        if not html:
+            return [], 1
+
+        # Same page as last time (fresh cache, HTTP 304 or identical download) needs no parsing at all
+        snapshot = self.get_snapshot(store, url)
+        page_hash = self.extractor.fingerprint(html)
+        if snapshot and snapshot["page_hash"] == page_hash:
+            return self.reuse_products(store, snapshot), snapshot["pages"]
+        old_content_hash = snapshot["content_hash"] if snapshot else None
+        if self.process_pool:
+            rows, pages, content_hash, phases, errors = self.process_pool.submit(extract_in_process, store, html, old_content_hash, self.incremental).result()
+            product_list = None if rows is None else [Product(*row) for row in rows]
+        else:
+            product_list, pages, content_hash, phases, errors = self.extractor.extract(store, html, old_content_hash, self.incremental)
+        for name, seconds in phases.items():
+            self.metrics.add_phase(name, seconds)
+        for error in errors:
+            self.metrics.error(error)
+
+        # Page changed only outside of product tables (banners, tokens, recommendations)
+        if product_list is None:
+            self.cache.put_snapshot(self.cache.key(url, store.name), page_hash, content_hash, snapshot["products"], pages)
+            return self.reuse_products(store, snapshot), pages
+        if page > 1 and product_list == store.not_found(): # Page after the last one, nothing is missing
+            product_list = []
+        self.save_snapshot(store, url, snapshot, page_hash, content_hash, product_list, pages)
+        return product_list, pages
+
+######## Incremental re-scrape: reuse products of stores that did not change ########
+
+    def get_snapshot(self, store, url):
+        """Products and fingerprints of the store page from last search, None in full mode"""
+
+        if not self.incremental:
+            return None
+        return self.cache.get_snapshot(self.cache.key(url, store.name))
 
-######## Get pages content using BeautifulSoup and Selenium ########
+    def reuse_products(self, store, snapshot):
+        """Products of unchanged store page, extraction is skipped"""
 
-    def get_pages(self, url):
-        """Getting page content with Beautiful Soup"""
+        product_list = snapshot["products"]
+        self.app.queue.put(f"{store.name}: unchanged since last search, {len(product_list)} items reused")
+        return product_list
 
-        self.url = url
-        try:
-            self.response = requests.get(self.url, timeout=5, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/112.0"})
-            self.response.raise_for_status()
-            self.page = self.response.content
-        except RequestException as e:
-            self.app.queue.put(f"Failed to get webpage: {e}")
+    def save_snapshot(self, store, url, snapshot, page_hash, content_hash, product_list, pages=1):
+        """Store products extracted from changed page and log what changed since last search"""
+
+        if not self.incremental:
+            return
+        if snapshot:
+            self.log_changes(store, snapshot["products"], product_list)
+        self.cache.put_snapshot(self.cache.key(url, store.name), page_hash, content_hash, product_list, pages)
+
+    def log_changes(self, store, old_product_list, product_list):
+        """Log new, gone and repriced products of the store, products are matched by link"""
+
+        old_prices = {item.link: item.price for item in old_product_list}
+        prices = {item.link: item.price for item in product_list}
+        new = [item for item in product_list if item.link not in old_prices]
+        gone = [link for link in old_prices if link not in prices]
+        repriced = [item for item in product_list if item.link in old_prices and old_prices[item.link] != item.price]
+        self.app.queue.put(f"{store.name}: changed since last search, {len(new)} new, {len(gone)} gone, {len(repriced)} price changes")
+        for item in repriced[:5]:
+            self.app.queue.put(f"                    {old_prices[item.link]} → {item.price} {item.description}")
+
+######## Get products through plain HTTP (API mode) for javascript stores ########
+
+    def get_items_api(self, store, url, search_string, page=1):
+        """Read products and number of result pages without browser from JSON endpoint or structured data of the page, None if not possible"""
+
+        api = store.api
+        if not api or self.api_disabled_until.get(store.name, 0) > time.monotonic():
             return None
-        else:
-            self.doc = BeautifulSoup(self.page, "html.parser")
-            return self.doc
-
-    def get_pages_java_script(self, url, script, find_multiple=False):
-        """Getting page content with Selenium for pages with javascript"""
-
-        self.url = url
-        self.script = script
-        self.options = Options()
-        self.options.add_argument('--headless')
-        self.driver = webdriver.Chrome(options=self.options)
-        self.driver.maximize_window()
-        self.driver.implicitly_wait(3)
+        api_url = api["url"].format(query=quote(search_string)) if "url" in api else url
         try:
-            self.driver.get(self.url)
-            if find_multiple: # For pages that return multiple tables with search results
-                self.doc = self.driver.find_elements(By.CSS_SELECTOR, self.script)
-                if not self.doc:
-                    self.app.queue.put(f"No elements found with the provided CSS selector on: {self.url[:20]}")
-                    return None
+            html = self.get_pages(api_url, ttl=store.cache_ttl, store=store)
+            if html is None:
+                raise ValueError("no response")
+            snapshot = self.get_snapshot(store, url)
+            page_hash = self.extractor.fingerprint(html)
+            if snapshot and snapshot["page_hash"] == page_hash:
+                return self.reuse_products(store, snapshot), snapshot["pages"]
+            pages = 1 # JSON endpoint returns all products of the search at once
+            if api["mode"] == "json":
+                with self.metrics.phase("parse"):
+                    data = json.loads(html)
+                with self.metrics.phase("extract"):
+                    product_list = self.get_items_json(api, data, api_url, store.name)
             else:
-                self.doc = self.driver.find_element(By.CSS_SELECTOR, self.script)
-        except NoSuchElementException:
-            self.app.queue.put(f"No elements found with the provided CSS selector on: {self.url[:45]}...")
-            return None
-        except Exception as e:
-            self.app.queue.put(f"An error occurred: {str(e)}")
+                with self.metrics.phase("parse"):
+                    doc = self.extractor.parsers[store.parser].parse(html)
+                pages = self.extractor.page_count(store, doc)
+                with self.metrics.phase("extract"):
+                    product_list = self.get_items_json_ld(doc, api_url, store.name)
+            if not product_list and page > 1: # Page after the last one
+                return [], pages
+            if not product_list:
+                raise ValueError("no products in response")
+        except (ValueError, KeyError, TypeError, IndexError) as e:
+            # Store is scraped with browser and API mode is not tried again for a while
+            self.api_disabled_until[store.name] = time.monotonic() + self.api_retry_after
+            self.app.queue.put(f"{store.name}: API mode failed ({e}), using hidden browser")
+            self.metrics.error(f"API mode failed: {e}")
             return None
-        return self.doc
-
-######## Get products from the webpage content for each of 9 stores ########
-
-    def get_items_hpstore(self, doc):
-
-        self.doc = doc
-        self.table = self.doc.find(class_="infogrid products")
-        #print(self.table.prettify()) # Left in case revision is required
-        if self.table == None:
-            self.product_list = [{'Description': 'HP Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.hpstore.lt/"}]
-            return self.product_list
-        self.items = self.table.find_all('li')
-        self.product_list = []
-        self.product = {}
-        for self.item in self.items:
-            self.product["Description"] = self.item.find('a').get('title')
-            self.product["Link"] = self.item.find('a').get('href')
-            self.product["Price"] = float(self.item.find('big2').get_text().split(" ")[0].replace(",", "."))
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_nesiojami(self, doc):
-
-        self.doc = doc
-        self.table = self.doc.find(class_="products columns-4")
-        #print(self.table.prettify()) # Left in case revision is required
-        if self.table == None:
-            self.product_list = [{'Description': 'Nesiojami: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://nesiojami.lt/"}]
-            return self.product_list
-        self.items = self.table.find_all('li')
-        self.product_list = []
-        self.product = {}
-        for self.item in self.items:
-            self.product["Description"] = self.item.find('h2', attrs={"class": "woocommerce-loop-product__title"}).get_text()
-            self.product["Link"] = self.item.find('a').get('href')
-            self.product["Price"] = float(self.item.find('bdi').get_text().replace(",", "").replace(" €", ""))
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_kilobaitas(self, doc):
-
-        self.doc = doc
-        self.table = self.doc.find(class_="products-grid row")
-        #print(self.table.prettify()) # Left in case revision is required
-        if self.table == None:
-            self.product_list = [{'Description': 'Kilobaitas: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.kilobaitas.lt/"}]
-            return self.product_list
-        self.items = self.table.find_all('div', class_='item-inner')
-        self.product_list = []
-        self.product = {}
-        for self.item in self.items:
-            self.product["Description"] = self.item.find('div', class_="item-title line-clamp").find('p').get_text()
-            self.product["Link"] = "https://www.kilobaitas.lt" + self.item.find('div', class_="item-title line-clamp").find('a').get('href')
-            self.product["Price"] = float(self.item.find('div', class_="item-price").find_all('meta')[1].get('content'))
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_skytech(self, doc):
-
-        self.doc = doc
-        self.table = self.doc.find('table', class_="productListing")
-        #print(self.table.prettify()) # Left in case revision is required
-        check_string = "prekių, atitinkančių"
-        if check_string in str(self.table):
-            self.product_list = [{'Description': 'Skytech: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.skytech.lt/"}]
-            return self.product_list
-        self.items = self.table.find_all(class_=["productListing odd", "productListing even"])
-        self.product_list = []
-        self.product = {}
-        for self.item in self.items:
-            self.product["Description"] = self.item.find('td', class_="name").find('a').get_text().strip()
-            self.product["Link"] = "https://www.skytech.lt/" + self.item.find('td', class_="name").find('a').get('href')
-            self.product["Price"] = float(self.item.find('td', class_="name").find_next_siblings('td')[1].find('strong').get_text().replace(" ", "").replace("€", ""))
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_senukai(self, doc):
-
-        self.doc = doc
-        self.items = self.doc.find_elements(By.CLASS_NAME, "sn-product-inner.sn-product-inner--hover.ks-gtm-categories")
-        self.product_list = []
-        if len(self.items) < 1:
-            self.product_list = [{'Description': 'Senukai Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.senukai.lt/"}]
-            return self.product_list
-        self.product = {}
-        for self.item in self.items:
-            self.product['Description'] = self.item.find_element(By.CLASS_NAME, "ks-new-product-name").get_attribute("innerHTML")
-            self.product['Link'] = self.item.find_element(By.CLASS_NAME, "ks-new-product-name").get_attribute('href')
-            self.product_price_item_interim = self.item.find_element(By.CLASS_NAME, "ks-item-price ")
-            self.product['Price'] = float(self.product_price_item_interim.find_element(By.TAG_NAME, 'span').get_attribute("innerHTML").replace("&nbsp;", "").replace(",", ".").replace("€", "").replace(" ", ""))
+        self.save_snapshot(store, url, snapshot, page_hash, None, product_list, pages)
+        return product_list, pages
+
+    def get_items_json(self, api, data, url, store_name=""):
+        """Map products of JSON endpoint response with field paths from store api settings"""
+
+        for key in api["items"].split("."):
+            data = data[int(key)] if isinstance(data, list) else data[key]
+        now = time.time()
+        product_list = []
+        for item in data:
+            values = {}
+            for field_name, path in api["fields"].items():
+                value = item
+                for key in path.split("."):
+                    value = value[int(key)] if isinstance(value, list) else value[key]
+                values[field_name] = value
+            price = float(str(values["price"]).replace(",", ".")) * api.get("price_scale", 1)
+            product_list.append(Product(clean_spaces(str(values["description"])), price, urljoin(url, values["link"]), store_name, now))
+        return product_list
+
+    def get_items_json_ld(self, doc, url, store_name=""):
+        """Read schema.org products from JSON-LD blocks that store embeds into server rendered page"""
+
+        nodes = []
+        for block in doc.select('script[type="application/ld+json"]'):
             try:
-                self.product['Price'] = float(self.item.find_element(By.CLASS_NAME, "ks-new-product-price__price-number").get_attribute("innerHTML").replace("&nbsp;", "").replace(",", ".").replace("€", "").replace(" ", ""))
-            except NoSuchElementException:
-                pass
-            self.product_list.append(self.product.copy())
-        return self.product_list
-        
-    def get_items_1a(self, doc):
-
-        self.doc = doc
-        self.items = self.doc.find_elements(By.CLASS_NAME, "catalog-taxons-product__hover")
-        self.product_list = []
-        if len(self.items) < 1:
-            self.product_list = [{'Description': '1a Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.1a.lt/"}]
-            return self.product_list
-        self.product = {}
-        for self.item in self.items:
-            self.product['Description'] = self.item.find_element(By.CLASS_NAME, "catalog-taxons-product__name").get_attribute("innerHTML").strip()
-            self.product['Link'] = self.item.find_element(By.CLASS_NAME, "catalog-taxons-product__name").get_attribute('href')
-            self.product_price_item_interim = self.item.find_element(By.CLASS_NAME, "catalog-taxons-product-price__item-price")
-            self.product['Price'] = float(self.product_price_item_interim.find_element(By.TAG_NAME, 'span').get_attribute("innerHTML").replace(",", ".").replace(" ", ""))
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_varle(self, doc):
-
-        self.doc = doc
-        self.items = self.doc.find_elements(By.CSS_SELECTOR, ".GRID_ITEM")
-        self.product_list = []
-        if len(self.items) < 1:
-            self.product_list = [{'Description': 'Varle Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.varle.lt/"}]
-            return self.product_list
-        self.product = {}
-        for self.item in self.items:
-            self.product['Description'] = self.item.find_element(By.CSS_SELECTOR, ".product-title").text.strip().replace("| ", "")
-            self.product_link_interim = self.item.find_element(By.CSS_SELECTOR, ".product-title")
-            self.product['Link'] = self.product_link_interim.find_element(By.TAG_NAME, "a").get_attribute('href')
-            self.product_price_item_interim = self.item.find_element(By.CSS_SELECTOR, ".price-value")
-            self.product['Price'] = float(self.product_price_item_interim.find_element(By.TAG_NAME, 'span').text.strip()) + 0.99
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_rde(self, doc):
-
-        self.doc_interim = doc
-        items_list = []
-        for table in self.doc:
-            items = table.find_elements(By.CLASS_NAME, "product__info")
-            items_list.extend(items)
-        self.product_list = []
-        if len(items_list) < 1:
-            self.product_list = [{'Description': 'RDE Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.rde.lt/"}]
-            return self.product_list
-        self.product = {}
-        for self.item in items_list:
-            self.product['Description'] = self.item.find_element(By.CLASS_NAME, "product__title ").text.replace("\n", " ").strip()
-            product_link_interim = self.item.find_element(By.CLASS_NAME, "product__title ")
-            self.product['Link'] = product_link_interim.find_element(By.TAG_NAME, "a").get_attribute('href')
-            self.product['Price'] = float(self.item.find_element(By.CLASS_NAME, "price").text.replace("€", "").strip())
-            self.product_list.append(self.product.copy())
-        return self.product_list
-
-    def get_items_pigu(self, doc):
-
-        self.doc = doc
-        self.items = self.doc.find_elements(By.CSS_SELECTOR, ".product-item-inner-hover")
-        self.product_list = []
-        if len(self.items) < 1:
-            self.product_list = [{'Description': 'Pigu Store: The products you were looking for were not found in the store', 'Price': 0, 'Link': "Search manually: https://www.pigu.lt/"}]
-            return self.product_list
-        self.product = {}
-        for self.item in self.items:
-            self.product['Description'] = self.item.find_element(By.CSS_SELECTOR, "p.product-name > a").get_attribute('title')
-            self.product['Link'] = self.item.find_element(By.CSS_SELECTOR, "p.product-name > a").get_attribute('href')
+                data = json.loads(block.text())
+            except ValueError:
+                continue
+            nodes.extend(data if isinstance(data, list) else [data])
+
+        now = time.time()
+        product_list = []
+        while nodes:
+            node = nodes.pop(0)
+            if not isinstance(node, dict):
+                continue
+            nodes.extend(node.get("@graph", []))
+            nodes.extend(element.get("item", element) for element in node.get("itemListElement", []) if isinstance(element, dict))
+            if node.get("@type") != "Product" or not node.get("offers"):
+                continue
+            offers = node["offers"][0] if isinstance(node["offers"], list) else node["offers"]
+            price = offers.get("price", offers.get("lowPrice"))
+            if price is None:
+                continue
+            product_list.append(Product(clean_spaces(node.get("name", "")), float(str(price).replace(",", ".")), urljoin(url, node.get("url", offers.get("url", ""))), store_name, now))
+        return product_list
+
+######## Get pages content using HTTP requests and Selenium ########
+
+    def get_pages(self, url, ttl=0, store=None):
+        """Getting page html with HTTP request, fresh cached page is used without network, store limits rate and timeout"""
+
+        key = self.cache.key(url)
+        with self.metrics.phase("cache"):
+            entry = self.cache.get(key)
+        if entry and self.cache.is_fresh(entry, ttl):
+            return entry["page"]
+
+        # Stale cached page is revalidated: server answers 304 if page did not change
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        policy = self.policies[store.name] if store else None
+        timeout = None
+        if policy:
+            self.metrics.add_phase("throttle", policy.throttle())
+            timeout = policy.timeout("http", self.http.timeout)
+        try:
+            download_start = time.perf_counter()
+            with self.metrics.phase("download"): # DNS, connection, server wait and body download together
+                response = self.http.get(url, headers=headers, timeout=timeout)
+                page = response.content
+            self.metrics.add_bytes(len(page))
+            if response.status_code == 304 and entry:
+                self.cache.touch(key)
+                page = entry["page"]
+            else:
+                response.raise_for_status()
+                self.cache.put(key, page, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+        except RequestException as e:
+            self.app.queue.put(f"Failed to get webpage: {e}")
+            self.metrics.error(f"Failed to get webpage: {e}")
+            self.metrics.reachable(False)
+            return None
+        self.metrics.reachable(True)
+        if policy:
+            policy.add_latency("http", time.perf_counter() - download_start)
+        return page
+
+    # Javascript run in the browser: html of every element matching CSS selector
+    tables_html_script = "return Array.from(document.querySelectorAll(arguments[0]), element => element.outerHTML);"
+
+    # Javascript run in the browser: html of product tables once they hold at least min_items products and products
+    # of every table stopped changing for idle seconds, or once the network was idle for a while (few products or
+    # 'not found' message), null while the page is still loading. Counts of last poll are kept in the page window
+    ready_tables_script = """
+        const [tablesSelector, itemsSelector, minItems, idleSeconds] = arguments;
+        if (!window.scrapingCounts) performance.setResourceTimingBufferSize(100000); // Default 250 entries stop growing on busy pages
+        const tables = Array.from(document.querySelectorAll(tablesSelector));
+        if (!tables.length) return null;
+        const counts = tables.map(table => table.querySelectorAll(itemsSelector).length);
+        const items = counts.reduce((total, count) => total + count, 0);
+        const now = performance.now();
+        if (window.scrapingCounts !== counts.join()) {
+            window.scrapingCounts = counts.join();
+            window.scrapingCountsChanged = now;
+        }
+        const stable = items >= minItems && now - window.scrapingCountsChanged >= idleSeconds * 1000;
+        const finished = performance.getEntriesByType("resource").map(entry => entry.responseEnd);
+        const idle = document.readyState === "complete" && now - Math.max(0, ...finished) > idleSeconds * 1000;
+        return stable || idle ? tables.map(table => table.outerHTML) : null;
+    """
+
+    # Javascript run in the browser: bytes transferred over network for the page and all its resources
+    transfer_size_script = "return performance.getEntries().reduce((total, entry) => total + (entry.transferSize || 0), 0);"
+
+    def get_pages_java_script(self, url, script, find_multiple=False, ttl=0, wait_timeout=5, pagination_selector=None, items_selector="*", min_items=1, network_idle=0.5, store=None):
+        """Getting html of product tables with Selenium for pages with javascript, fresh cached page is used without browser"""
+
+        key = self.cache.key(url, script)
+        with self.metrics.phase("cache"):
+            entry = self.cache.get(key)
+        if entry and self.cache.is_fresh(entry, ttl):
+            return entry["page"]
+
+        policy = self.policies[store.name] if store else None
+        page_load_timeout = self.driver_pool.page_load_timeout
+        if store: # Browser gives up before the search stops waiting for the store
+            page_load_timeout = min(page_load_timeout, store.timeout - store.wait_timeout)
+        if policy:
+            self.metrics.add_phase("throttle", policy.throttle())
+            page_load_timeout = policy.timeout("browser", page_load_timeout)
+        page_load_seconds = None
+        browser_start = time.perf_counter()
+        with self.driver_pool.driver() as driver: # Borrows warm Chrome browser from the pool
+            self.metrics.add_phase("browser_start", time.perf_counter() - browser_start) # Waiting for free browser or Chrome launch
             try:
-                self.product['Price'] = float(self.item.find_element(By.CSS_SELECTOR, ".price").text.replace(" ", "").replace("€", "").strip()) / 100
-            except NoSuchElementException:
-                continue        
-            self.product_list.append(self.product.copy())
-        return self.product_list
+                with self.metrics.phase("page_load"):
+                    page_load_start = time.perf_counter()
+                    driver.set_page_load_timeout(page_load_timeout)
+                    driver.get(url)
+                    page_load_seconds = time.perf_counter() - page_load_start
+                self.metrics.reachable(True)
+                # One script call returns html of all product tables instead of a WebDriver call per element,
+                # it is repeated every 0.1 s until products stop coming, network is idle or wait_timeout runs out
+                complete = True
+                with self.metrics.phase("wait"):
+                    try:
+                        tables = WebDriverWait(driver, wait_timeout, poll_frequency=0.1).until(
+                            lambda driver: driver.execute_script(self.ready_tables_script, script, items_selector, min_items, network_idle)
+                        )
+                    except TimeoutException:
+                        # Page never went quiet, products rendered so far are better than none
+                        tables = driver.execute_script(self.tables_html_script, script)
+                        if not tables:
+                            raise
+                        complete = False
+                        self.metrics.error("Product table still changing, read without waiting")
+                if not find_multiple: # For pages that return multiple tables with search results all of them are kept
+                    tables = tables[:1]
+                if pagination_selector: # Page links are kept to know the number of result pages
+                    tables += driver.execute_script(self.tables_html_script, pagination_selector)
+                self.metrics.add_bytes(driver.execute_script(self.transfer_size_script) or 0)
+                # Save html of rendered product tables, products are read from it after browser is returned
+                page = "\n".join(tables).encode("utf-8")
+            except TimeoutException:
+                if page_load_seconds is None:
+                    self.app.queue.put(f"Page did not load in {page_load_timeout:.0f} seconds: {url[:45]}...")
+                    self.metrics.error("Page load timeout")
+                    self.metrics.reachable(False)
+                else: # Page loaded, search may have no results
+                    self.app.queue.put(f"No elements found with the provided CSS selector on: {url[:45]}...")
+                    self.metrics.error("Product table not found")
+                return None
+            except Exception as e:
+                self.app.queue.put(f"An error occurred: {str(e)}")
+                self.metrics.error(str(e))
+                if page_load_seconds is None:
+                    self.metrics.reachable(False)
+                return None
+        if policy:
+            policy.add_latency("browser", page_load_seconds)
+        if complete: # Table read before it settled is fetched again next time
+            self.cache.put(key, page)
+        return page
 
 ####################################
 # Application main window and loop #
@@ -664,28 +2481,78 @@ class App(tk.Tk):
         self.search_buttons = Buttons(self)
         self.log_area = LogArea(self)
         self.queue = queue.Queue()
-        self.items = GetItems(self, self.log_area)
+        self.result_queue = queue.Queue() # Products of finished stores for result windows
+
+        # Scraping libraries are imported while window opens, GetItems is created with the first search
+        self.items = None
+        Thread(target=load_scraping_libraries, daemon=True).start()
+
+        # Close hidden browsers together with the main window
+        self.protocol("WM_DELETE_WINDOW", self.close_app)
+        self.after_idle(self.report_startup_time)
+
+        # One polling loop for the whole app moves queued messages and products into the windows
+        self.after(100, self.check_queue)
+
+    def report_startup_time(self):
+        """Show how long it took to open the main window"""
+
+        self.log_area.insert_log_message(f"App window opened in {time.perf_counter() - start_time:.2f} s")
+
+    def close_app(self):
+        """Shut down hidden browsers and close the app"""
+
+        if self.items is not None:
+            self.items.close()
+        self.destroy()
 
     def open_link(self, url):
         """Opens default browser with link pressed"""
 
         webbrowser.get().open(url)
 
-    def check_queue(self):
-        """Function to extract messages from queue into terminal"""
-
-        while not self.queue.empty():
-            message = self.queue.get_nowait()
-            self.log_area.insert_log_message(message)
+    def check_queue(self, max_messages=500):
+        """Function to extract messages from queue into terminal and products of finished stores into result windows"""
+
+        # Messages that came since last check are inserted at once, the rest waits for the next check
+        messages = []
+        while len(messages) < max_messages and not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        self.log_area.insert_log_messages(messages)
+        while not self.result_queue.empty():
+            show, product_list = self.result_queue.get_nowait()
+            if not show.winfo_exists(): # Result window closed while search still running
+                continue
+            if product_list is None: # All stores finished
+                show.finish_results()
+            else:
+                show.add_results(product_list)
         self.after(100, self.check_queue)
 
-    def scrape_product_list(self, search_string, filter_status):
-        """Main function to operate scraping loop"""
+    def scrape_product_list(self, show, search_string, filter_status):
+        """Main function to operate scraping loop, products are sent to result window store by store"""
 
-        self.product_list = self.items.get_product_list(search_string, filter_status)
-        self.show = ShowResults(self, self.log_area)
-        self.show.insert_results(self.product_list, search_string)
+        try:
+            self.product_list = self.items.get_product_list(search_string, filter_status, on_store_done=lambda store_name, product_list: self.result_queue.put((show, product_list)))
+        except RuntimeError:
+            if self.items.engine.closed: # App closed during search
+                return
+            raise
+        self.result_queue.put((show, None))
+
+    def request_and_result(self, search_string):
+        """Function to start scraping and does it in separate Thread to keep main loop alive and be able show log messages"""
         
+        self.log_area.insert_log_message("Search started. Please wait...")
+        self.log_area.update_idletasks()
+        filter_status = self.search_buttons.checkbutton_var.get()
+
+        # Result window is opened at once and fills in while stores are scraped
+        self.show = ShowResults(self, self.log_area)
+        self.show.start_results(search_string)
+        if self.items is None: # Waits here only if scraping libraries are still being imported
+            self.items = GetItems(self, self.log_area)
+
         # Changes the position of new 'Search results' window every time the function is called
         global window_x
         global window_y
@@ -699,16 +2566,9 @@ class App(tk.Tk):
             window_x -= 180
             window_y -= 180
 
-    def request_and_result(self, search_string):
-        """Function to start scraping and does it in separate Thread to keep main loop alive and be able show log messages"""
-        
-        self.log_area.insert_log_message("Search started. Please wait...")
-        self.log_area.update_idletasks()
-        filter_status = self.search_buttons.checkbutton_var.get()
-        self.scrape_thread = Thread(target=self.scrape_product_list, args=(search_string, filter_status))
+        self.scrape_thread = Thread(target=self.scrape_product_list, args=(self.show, search_string, filter_status))
         self.scrape_thread.start()
         self.after(100, self.check_scrape_thread)
-        self.check_queue()
 
     def check_scrape_thread(self):
         """Function to check Thread progress"""
@@ -719,10 +2579,125 @@ class App(tk.Tk):
             # If the thread has finished, enable the buttons and stop checking.
             self.search_buttons.enable_all_buttons()
 
+#########################################
+# Headless batch mode without Tk window #
+#########################################
+
+class BatchRun():
+    """Runs many searches from a file without GUI and writes results to JSON or CSV"""
+
+    def __init__(self, concurrency=3, max_workers=None, max_browsers=5, filter_status=False, quiet=False, incremental=True, lightweight_browsers=True, group=False, processes=0):
+
+        # Log messages of GetItems are printed to stderr instead of log area
+        self.queue = queue.Queue()
+        self.quiet = quiet
+        self.concurrency = concurrency
+        self.filter_status = filter_status
+        self.group = group # One product per group of the same laptop from different stores, see ProductMatcher
+
+        # Searches share one GetItems: HTTP connections, browsers and cache are reused across searches
+        self.items = GetItems(self, None, max_workers=max_workers or 9 * concurrency, max_browsers=max_browsers, incremental=incremental, lightweight_browsers=lightweight_browsers, processes=processes)
+
+    def read_searches(self, path):
+        """Search strings from file, one per line, empty lines and lines starting with # are skipped"""
+
+        with open(path, encoding="utf-8") as file:
+            return [line.strip() for line in file if line.strip() and not line.strip().startswith("#")]
+
+    def print_log(self):
+        """Print queued log messages"""
+
+        while not self.queue.empty():
+            message = self.queue.get_nowait()
+            if not self.quiet:
+                print(message.strip(), file=sys.stderr)
+
+    def run(self, searches):
+        """Run searches, up to concurrency of them at once, results keep order of searches"""
+
+        results = [None] * len(searches)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.items.get_product_list, search_string, self.filter_status): index for index, search_string in enumerate(searches)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.5)
+                for future in done:
+                    index = futures[future]
+                    try:
+                        product_list = future.result()
+                    except Exception as e:
+                        # Failed search (e.g. history database locked by the app) is written with its error, sweep goes on
+                        self.queue.put(f"Search '{searches[index]}' failed: {e}")
+                        results[index] = {"search": searches[index], "products": [], "error": str(e)}
+                        continue
+                    # Products with number of offers, more than one only when products are grouped
+                    offers = ProductMatcher().group(product_list) if self.group else [(product, 1) for product in product_list]
+                    results[index] = {"search": searches[index], "products": offers}
+                self.print_log()
+        return results
+
+    def write_results(self, results, path, output_format=None):
+        """Write results to JSON (list of searches) or CSV (one row per product)"""
+
+        output_format = output_format or ("csv" if path.lower().endswith(".csv") else "json")
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            if output_format == "csv":
+                writer = csv.writer(file)
+                writer.writerow(["Search", "Description", "Price", "Link", "Store", "Offers", "Error"])
+                for result in results:
+                    if "error" in result:
+                        writer.writerow([result["search"], "", "", "", "", "", result["error"]])
+                    for product, offers in result["products"]:
+                        writer.writerow([result["search"], product.description, product.price, product.link, product.store, offers, ""])
+            else:
+                json.dump([dict(result, products=[dict(asdict(product), offers=offers) for product, offers in result["products"]]) for result in results], file, ensure_ascii=False, indent=2)
+
+    def close(self):
+        """Close browsers, connections and cache"""
+
+        self.items.close()
+
+
+def main(arguments=None):
+    """Start GUI, or batch mode when --batch is given"""
+
+    argument_parser = argparse.ArgumentParser(description="Scrape Lithuanian web-stores for gaming computers and their prices")
+    argument_parser.add_argument("--batch", metavar="FILE", help="run searches from file (one per line) without GUI")
+    argument_parser.add_argument("--output", metavar="FILE", default="results.json", help="batch results file, .json or .csv (default: results.json)")
+    argument_parser.add_argument("--format", choices=["json", "csv"], help="batch results format, by default taken from --output extension")
+    argument_parser.add_argument("--concurrency", type=int, default=3, help="searches run at once in batch mode (default: 3)")
+    argument_parser.add_argument("--workers", type=int, help="stores scraped at once across all searches (default: 9 per concurrent search)")
+    argument_parser.add_argument("--browsers", type=int, default=5, help="max hidden Chrome browsers (default: 5)")
+    argument_parser.add_argument("--processes", type=int, default=0, help=f"worker processes parsing pages on other cores, e.g. {os.cpu_count()} (default: 0, pages are parsed by scraping threads)")
+    argument_parser.add_argument("--group", action="store_true", help="write the same laptop from different stores once, with its best price and number of offers")
+    argument_parser.add_argument("--full-browsers", action="store_true", help="let hidden Chrome load images, fonts, styles and trackers")
+    argument_parser.add_argument("--price-filter", action="store_true", help="keep only products in price range 1800-2400€")
+    argument_parser.add_argument("--full", action="store_true", help="extract every store again even if its page did not change since last search")
+    argument_parser.add_argument("--quiet", action="store_true", help="do not print log messages")
+    arguments = argument_parser.parse_args(arguments)
+
+    if not arguments.batch:
+        app = App()
+        app.mainloop()
+        return
+
+    batch = BatchRun(concurrency=arguments.concurrency, max_workers=arguments.workers, max_browsers=arguments.browsers, filter_status=arguments.price_filter, quiet=arguments.quiet, incremental=not arguments.full, lightweight_browsers=not arguments.full_browsers, group=arguments.group, processes=arguments.processes)
+    print(f"Ready to scrape in {time.perf_counter() - start_time:.2f} s", file=sys.stderr)
+    try:
+        searches = batch.read_searches(arguments.batch)
+        start = time.perf_counter()
+        results = batch.run(searches)
+        batch.write_results(results, arguments.output, arguments.format)
+        print(f"{len(searches)} searches, {sum(len(result['products']) for result in results)} products in {time.perf_counter() - start:.1f} s written to {arguments.output}", file=sys.stderr)
+        failed = sum(1 for result in results if "error" in result)
+        if failed:
+            print(f"{failed} searches failed, see 'error' in results", file=sys.stderr)
+    finally:
+        batch.close()
+
 # Setting the global values for "Search results" window position
 window_x = 700
 window_y = 50
 
 if __name__ == "__main__":
-    app = App()
-    app.mainloop()
+    main()
@@ -0,0 +1,56 @@
+# Grouping of the same laptop from different stores, see ProductMatcher in scraping.py
+#
+# Run from repository root:
+#   python -m pytest -q tests
+
+from scraping import Product, ProductMatcher
+
+
+def group(*titles):
+    """Groups of titles as sets of descriptions"""
+
+    matcher = ProductMatcher()
+    for number, title in enumerate(titles):
+        matcher.add(Product(title, 1000.0 + number, f"https://store.lt/p/{number}"))
+    return {frozenset(item.description for item in matcher.offers(root)) for root in {matcher.find(number) for number in range(len(titles))}}
+
+
+def test_windows_edition_is_not_model_number():
+    dell = "Dell G16 7630 i7-13650HX 16GB 1TB SSD RTX 4060 Win11Pro"
+    asus = "Asus ROG Strix G16 G614JI-N4240W i7-13650HX 16GB 1TB SSD RTX 4070 Win11Pro"
+    lenovo = "Lenovo Legion 5 16IRX9 i7-14650HX 32GB 1TB SSD RTX 4060 Windows11"
+    hp = "HP Victus 16-r0012nw i5-13500H 16GB 512GB SSD RTX3050 Windows11"
+    acer = "Acer Nitro V 15 ANV15-51 i5-13420H 16GB 512GB SSD RTX 4050 W11"
+    msi = "MSI Katana 15 B13VFK i7-13620H 16GB 1TB SSD RTX 4060 W11H"
+    assert len(group(dell, asus, lenovo, hp, acer, msi)) == 6
+
+
+def test_screen_size_keeps_laptops_apart():
+    omen_16 = "HP Omen 16 i7-13700HX 32GB 1TB SSD RTX 4070"
+    omen_17 = "HP Omen 17 i7-13700HX 32GB 1TB SSD RTX 4070"
+    assert len(group(omen_16, omen_17)) == 2
+
+
+def test_same_laptop_from_different_stores_is_grouped():
+    first = "HP Omen 16 i7-13700HX 32GB 1TB SSD RTX 4070"
+    second = "Nešiojamas kompiuteris HP Omen 16, i7 13700HX, 32 GB, 1 TB SSD, RTX 4070"
+    third = "Lenovo Legion 5 16IRX9 i7-14650HX 32GB 1TB SSD RTX 4060"
+    fourth = "Lenovo Legion 5 16IRX9 Intel Core i7-14650HX 32 GB 1TB RTX 4060 Win11"
+    assert group(first, second, third, fourth) == {frozenset({first, second}), frozenset({third, fourth})}
+
+
+def test_family_code_with_different_configurations_is_not_grouped():
+    legion_i5 = "Lenovo Legion 5 16IRX9 i5-13450HX 16GB 512GB SSD RTX 4050"
+    legion_i7 = "Lenovo Legion 5 16IRX9 i7-14650HX 32GB 1TB SSD RTX 4060"
+    katana_small = "MSI Katana 15 B13VFK i7-13620H 16GB 1TB SSD RTX 4060"
+    katana_big = "MSI Katana 15 B13VFK i7-13620H 32GB 2TB SSD RTX 4060"
+    nitro_i5 = "Acer Nitro V 15 ANV15-51 i5-13420H 8GB 512GB SSD RTX 2050"
+    nitro_i7 = "Acer Nitro V 15 ANV15-51 i7-13620H 16GB 1TB SSD RTX 4050"
+    assert len(group(legion_i5, legion_i7, katana_small, katana_big, nitro_i5, nitro_i7)) == 6
+
+
+def test_family_code_joins_only_matching_configuration():
+    legion_i5 = "Lenovo Legion 5 16IRX9 i5-13450HX 16GB 512GB SSD RTX 4050"
+    legion_i7 = "Lenovo Legion 5 16IRX9 i7-14650HX 32GB 1TB SSD RTX 4060"
+    legion_i7_other_store = "Lenovo Legion 5 16IRX9 Intel Core i7-14650HX 32 GB RTX 4060"
+    assert group(legion_i5, legion_i7, legion_i7_other_store) == {frozenset({legion_i5}), frozenset({legion_i7, legion_i7_other_store})}